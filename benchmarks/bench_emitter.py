@@ -0,0 +1,70 @@
+from epigen.tokenizer import Tokenizer
+
+from epigen.symbol import EpiClass
+
+from epigen.idlparser import idlparser_base as idl
+from epigen.linker import linker as ln
+from epigen.code_generator import code_generator_builder as bld
+from epigen.code_generator import code_generator_emitter as emt
+
+from bench_tokenizer import generate_corpus
+
+import os
+import argparse
+import tempfile
+import timeit
+
+
+def emit(classes: list, fn):
+
+    for clss in classes:
+        fn(clss, bld.Builder()).build()
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser()
+
+    argparser.add_argument(
+        '--classes',
+        type=int,
+        default=10
+    )
+
+    argparser.add_argument(
+        '--properties',
+        type=int,
+        default=200
+    )
+
+    argparser.add_argument(
+        '--number',
+        type=int,
+        default=3
+    )
+
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        path = os.path.join(tmpdir, 'corpus.epi')
+        generate_corpus(path, args.classes, args.properties)
+
+        registry_local, errors_syntax = idl.IDLParser(Tokenizer(path, path, path).tokenize_iter()).parse()
+        assert len(errors_syntax) == 0
+
+        linker = ln.Linker()
+        linker.register(registry_local)
+
+        errors_linkage = linker.link()
+        assert len(errors_linkage) == 0
+
+        classes = [sym for sym in linker.registry.values() if isinstance(sym, EpiClass)]
+        nproperties = sum(len(clss.properties) for clss in classes)
+
+        print(f'Classes: {len(classes)}, {nproperties} properties')
+
+        for label, fn in [('emit_class_meta', emt.emit_class_meta), ('emit_class_serialization', emt.emit_class_serialization)]:
+
+            seconds = min(timeit.repeat(lambda: emit(classes, fn), number=args.number, repeat=5)) / args.number
+            print(f'{label:<32} {seconds * 1e3:10.2f} ms {seconds * 1e9 / nproperties:10.1f} ns/property')
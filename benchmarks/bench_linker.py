@@ -0,0 +1,107 @@
+from epigen.tokenizer import Tokenizer
+
+from epigen.idlparser import idlparser_base as idl
+from epigen.linker import linker as ln
+
+from bench_tokenizer import generate_corpus
+
+import os
+import argparse
+import tempfile
+import timeit
+
+
+def generate_registries(dirpath: str, nfiles: int, nclasses: int) -> list:
+
+    registries = []
+    for i in range(nfiles):
+
+        path = os.path.join(dirpath, f'file{i}.epi')
+        with open(path, 'w') as f:
+
+            for j in range(nclasses):
+                f.write(f'class Class{i}_{j}\n{{\n    epiS32 Value = 42;\n}};\n\n')
+
+        registry_local, errors_syntax = idl.IDLParser(Tokenizer(path, path, path).tokenize_iter()).parse()
+        assert len(errors_syntax) == 0
+
+        registries.append(registry_local)
+
+    return registries
+
+
+def register(registries: list) -> ln.Linker:
+
+    linker = ln.Linker()
+    for registry_local in registries:
+        linker.register(registry_local)
+
+    return linker
+
+
+def link(registries: list) -> list:
+
+    errors_linkage = register(registries).link()
+    assert len(errors_linkage) == 0
+
+    return errors_linkage
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser()
+
+    argparser.add_argument(
+        '--files',
+        type=int,
+        default=200
+    )
+
+    argparser.add_argument(
+        '--classes',
+        type=int,
+        default=20
+    )
+
+    argparser.add_argument(
+        '--depth',
+        type=int,
+        default=100,
+        help='The depth of the class hierarchy to link'
+    )
+
+    argparser.add_argument(
+        '--properties',
+        type=int,
+        default=20
+    )
+
+    argparser.add_argument(
+        '--number',
+        type=int,
+        default=3
+    )
+
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        registries = generate_registries(tmpdir, args.files, args.classes)
+        nsymbols = args.files * args.classes
+
+        print(f'Registry: {args.files} files, {nsymbols} symbols')
+
+        seconds = min(timeit.repeat(lambda: register(registries), number=args.number, repeat=5)) / args.number
+        print(f'{"register":<32} {seconds * 1e3:10.2f} ms {seconds * 1e9 / nsymbols:10.1f} ns/symbol')
+
+        path = os.path.join(tmpdir, 'hierarchy.epi')
+        generate_corpus(path, args.depth, args.properties)
+
+        registry_local, errors_syntax = idl.IDLParser(Tokenizer(path, path, path).tokenize_iter()).parse()
+        assert len(errors_syntax) == 0
+
+        nproperties = args.depth * (args.properties + 1)
+        print(f'Hierarchy: {args.depth} classes deep, {nproperties} properties')
+
+        seconds = min(timeit.repeat(lambda: link([registry_local]), number=args.number, repeat=5)) / args.number
+        print(f'{"link":<32} {seconds * 1e3:10.2f} ms {seconds * 1e9 / nproperties:10.1f} ns/property')
@@ -0,0 +1,116 @@
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+import time
+
+
+EPIGENRUN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'epigenrun.py')
+
+# NOTE: the query modes should import the discovery only, but none of these
+HEAVY = [
+    'epigen.epigen',
+    'epigen.tokenizer',
+    'epigen.symbol',
+    'epigen.idlparser',
+    'epigen.linker',
+    'epigen.code_generator',
+    'pickle',
+    'hashlib',
+    'sqlite3',
+    'concurrent.futures',
+    'multiprocessing'
+]
+
+
+def importtime(args: list) -> list:
+
+    # NOTE: every line of the report is `import time: <self us> | <cumulative us> | <nested module name>`
+    process = subprocess.run([sys.executable, '-X', 'importtime', EPIGENRUN] + args,
+                             stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE,
+                             universal_newlines=True,
+                             check=True)
+
+    imports = []
+    for line in process.stderr.splitlines():
+
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        us_self, us_cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(us_self), int(us_cumulative)))
+
+    return imports
+
+
+def walltime(args: list, number: int) -> float:
+
+    seconds = []
+    for _ in range(number):
+
+        time_start = time.perf_counter()
+        subprocess.run([sys.executable, EPIGENRUN] + args, stdout=subprocess.DEVNULL, check=True)
+        seconds.append(time.perf_counter() - time_start)
+
+    return min(seconds)
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser()
+
+    argparser.add_argument(
+        '--number',
+        type=int,
+        default=10
+    )
+
+    argparser.add_argument(
+        '--top',
+        type=int,
+        default=10
+    )
+
+    argparser.add_argument(
+        '--check',
+        action='store_true',
+        help='Fail if a query mode imports any of the heavy subsystems'
+    )
+
+    args = argparser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        for i in range(10):
+
+            with open(os.path.join(tmpdir, f'file{i}.epi'), 'w') as f:
+                f.write(f'class Class{i} {{ epiS32 Value; }};\n')
+
+        baseline = walltime(['--help'], args.number)
+        print(f'{"--help":<24} {baseline * 1e3:10.2f} ms')
+
+        for mode in ['--print-outputs', '--print-dependencies']:
+
+            mode_args = ['-i', tmpdir, mode, '--no-caching']
+
+            imports = importtime(mode_args)
+            heavy = [name for name, _, _ in imports if any(name == h or name.startswith(f'{h}.') for h in HEAVY)]
+
+            seconds = walltime(mode_args, args.number)
+            us_imports = sum(us_self for _, us_self, _ in imports)
+
+            print(f'{mode:<24} {seconds * 1e3:10.2f} ms {len(imports):6} imports {us_imports / 1e3:10.2f} ms importing')
+
+            for name, _, us_cumulative in sorted(imports, key=lambda i: i[2], reverse=True)[:args.top]:
+                print(f'    {name:<40} {us_cumulative / 1e3:10.2f} ms')
+
+            if len(heavy) > 0:
+
+                print(f'    heavy imports: {", ".join(heavy)}')
+                failed = True
+
+    if args.check and failed:
+        exit(1)
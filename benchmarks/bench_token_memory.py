@@ -0,0 +1,56 @@
+from epigen.tokenizer import Tokenizer
+
+from epigen.idlparser import idlparser_base as idl
+
+from bench_tokenizer import generate_corpus
+
+import os
+import argparse
+import tempfile
+import tracemalloc
+
+
+def measure(label: str, fn):
+
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{label:<24} current={current / 2 ** 20:8.1f} MiB peak={peak / 2 ** 20:8.1f} MiB')
+
+    return result
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser()
+
+    argparser.add_argument(
+        '--classes',
+        type=int,
+        default=1000
+    )
+
+    argparser.add_argument(
+        '--properties',
+        type=int,
+        default=100
+    )
+
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        path = os.path.join(tmpdir, 'corpus.epi')
+        generate_corpus(path, args.classes, args.properties)
+
+        relpath = os.path.join('some', 'nested', 'module', 'directory', 'corpus.epi')
+        modulepath = os.path.join('module', 'directory', 'corpus.epi')
+
+        tokens = measure('tokens', lambda: Tokenizer(path, relpath, modulepath).tokenize())
+        print(f'Corpus: {os.path.getsize(path)} bytes, {args.classes * args.properties} properties, {len(tokens)} tokens')
+        del tokens
+
+        measure('tokens + registry', lambda: idl.IDLParser(Tokenizer(path, relpath, modulepath).tokenize()).parse())
+        measure('streamed registry', lambda: idl.IDLParser(Tokenizer(path, relpath, modulepath).tokenize_iter()).parse())
@@ -0,0 +1,100 @@
+from epigen.tokenizer import Tokenizer
+from epigen.tokenizer import TokenType
+
+from epigen.idlparser import idlparser_base as idl
+
+import os
+import argparse
+import tempfile
+import timeit
+
+
+_PROPERTY_TYPES = [
+    ('epiS32', '42'),
+    ('epiU64', '0'),
+    ('epiFloat', '4.2f'),
+    ('epiDouble', '4.2'),
+    ('epiBool', 'true'),
+    ('epiString', '"Name"'),
+    ('epiVec3f', None),
+    ('epiArray<epiS32>', None)
+]
+
+
+def generate_corpus(path: str, nclasses: int, nproperties: int):
+
+    with open(path, 'w') as f:
+
+        for i in range(nclasses):
+
+            f.write(f'enum Enum{i} : epiS32\n{{\n    Value0,\n    Value1 = 42\n}};\n\n')
+
+            parent = f' : Class{i - 1}' if i > 0 else ''
+            f.write(f'class Class{i}{parent}\n{{\n')
+
+            for j in range(nproperties):
+
+                typename, value = _PROPERTY_TYPES[j % len(_PROPERTY_TYPES)]
+                value = f' = {value}' if value is not None else ''
+                attrs = '[ReadOnly, Transient]\n    ' if j % 5 == 0 else ''
+
+                f.write(f'    {attrs}{typename} Property{i}_{j}{value};\n')
+
+            f.write(f'    Enum{i} Property{i}_Enum = Enum{i}::Value1;\n}};\n\n')
+
+
+def bench(label: str, stmt, number: int, ntokens: int):
+
+    seconds = min(timeit.repeat(stmt, number=number, repeat=5)) / number
+    print(f'{label:<32} {seconds * 1e3:10.2f} ms {seconds * 1e9 / ntokens:10.1f} ns/token')
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser()
+
+    argparser.add_argument(
+        '--classes',
+        type=int,
+        default=200
+    )
+
+    argparser.add_argument(
+        '--properties',
+        type=int,
+        default=50
+    )
+
+    argparser.add_argument(
+        '--number',
+        type=int,
+        default=3
+    )
+
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        path = os.path.join(tmpdir, 'corpus.epi')
+        generate_corpus(path, args.classes, args.properties)
+
+        tokens = Tokenizer(path, path, path).tokenize()
+        ntokens = len(tokens)
+
+        print(f'Corpus: {os.path.getsize(path)} bytes, {ntokens} tokens')
+
+        def classify():
+
+            for t in tokens:
+
+                t.is_keyword()
+                t.is_builtin_type()
+                t.is_fundamental()
+                t.is_integer()
+                t.tokentype in TokenType.literals()
+                t.tokentype in TokenType.assignable()
+                t.tokentype in TokenType.attributes()
+
+        bench('tokenize', lambda: Tokenizer(path, path, path).tokenize(), args.number, ntokens)
+        bench('classify', classify, args.number, ntokens)
+        bench('tokenize + parse', lambda: idl.IDLParser(Tokenizer(path, path, path).tokenize()).parse(), args.number, ntokens)
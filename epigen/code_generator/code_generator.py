@@ -2,13 +2,20 @@ from epigen.symbol import EpiSymbol
 
 from epigen.code_generator import code_generator_emitter as emmiter
 from epigen.code_generator import code_generator_builder as bld
+from epigen.code_generator import code_generator_document as doc
+from epigen.code_generator import code_generator_database as db
+from epigen.code_generator import code_generator_backend as bk
 from epigen.symbol import EpiClass, EpiEnum
 
 from epigen.config import EpiGenConfig
+from epigen.discovery import _RACY_INTERVAL_NS
+
+from epigen import profiler as prof
 
 import os
-import pickle
+import time
 import hashlib
+import dataclasses
 from enum import Enum, auto
 
 
@@ -47,62 +54,121 @@ class CodeGenerationErrorFatal(Exception):
     pass
 
 
+def _is_racy(filestat: tuple, time_ns: int) -> bool:
+
+    # NOTE: the file modified within the racy interval before it was stat'ed could have been modified
+    # again without its mtime being changed (coarse mtime granularity), so its stat isn't trusted
+    return filestat[1] >= time_ns - _RACY_INTERVAL_NS
+
+
 class CodeGenerator:
 
-    def __init__(self, symbols: list, config: EpiGenConfig):
+    def __init__(self, symbols: list, config: EpiGenConfig, dependencies: dict = None, backend: bk.Backend = None, inputs: dict = None):
 
         self.__symbols = symbols
         self.__config = config
+        self.__dependencies = dependencies if dependencies is not None else {}
+
+        # NOTE: the digest and the stat of every input as of the version which was parsed
+        # along with the time it was stat'ed at (by its relpath)
+        self.__inputs = inputs if inputs is not None else {}
 
         self.__codegen_erros = []
 
-        self.__cache_files_generated = {}
         self.__cache_files_storebuff = {}
+        self.__cache_files_inputs = {}
+        self.__cache_symbols = {}
+
+        self.__checksums = {}
+        self.__dirty_dependents = set()
+
+        # NOTE: every file is read and written through the backend
+        self.__backend = backend if backend is not None else bk.FileSystemBackend(self.__config.fsync)
+
+        self.__database = None
+        if self.__config.caching:
+
+            path = f'{self.__config.dir_output_build}/epigen-cache.db'
+            self.__database = self.__backend.database(path, db.BuildDatabase.fingerprint_of(self.__config))
+
+    @property
+    def errors(self) -> list:
+        return self.__codegen_erros
+
+    @property
+    def backend(self) -> bk.Backend:
+        return self.__backend
 
-        if self.__config.caching and os.path.exists(f'{self.__config.dir_output_build}/epigen-cache.bin'):
+    def dump(self) -> tuple:
 
-            with open(f'{self.__config.dir_output_build}/epigen-cache.bin', 'rb') as f:
-                self.__cache_files_generated = pickle.load(f)
+        try:
+            return self._dump()
 
-    def dump(self):
+        except BaseException:
 
-        for path, content in self.__cache_files_storebuff.items():
+            if self.__database is not None:
+                self.__database.rollback()
 
-            with open(path, 'w') as f:
-                f.write(content)
+            raise
 
-            if self.__config.caching:
-                self.__cache_files_generated[path] = hashlib.md5(content.encode()).hexdigest()
+    def _dump(self) -> tuple:
 
-        if self.__config.caching:
-            with open(f'{self.__config.dir_output_build}/epigen-cache.bin', 'wb') as f:
-                pickle.dump(self.__cache_files_generated, f)
+        outputs = [(path, str(document)) for path, document in self.__cache_files_storebuff.items()]
+        written, skipped = self.__backend.write(outputs)
+
+        if self.__database is not None:
+
+            for path, content in outputs:
+
+                checksum = hashlib.md5(content.encode()).hexdigest()
+                self.__database.output_store(path, self.__cache_files_inputs[path], checksum, self._file_stat(path))
+
+        prof.count('files_written', len(written))
+        prof.count('files_skipped', len(skipped))
+
+        if self.__database is not None:
+
+            for epifilepath, names in self.__cache_symbols.items():
+                self.__database.symbols_store(epifilepath, names)
+
+            self.__database.commit()
+
+        return written, skipped
 
     def _push_error(self, basename: str, err_code: CodeGenerationErrorCode, tip: str = ''):
         self.__codegen_erros.append(CodeGenerationError(basename, err_code, tip))
         raise CodeGenerationErrorFatal()
 
-    def _content_load(self, basename: str, ext: str) -> str:
+    def _document_load(self, basename: str, ext: str) -> doc.Document:
 
         filepath = self._filepath_of(basename, ext)
         if filepath not in self.__cache_files_storebuff:
 
-            with open(filepath, 'r') as f:
+            content = self.__backend.read(filepath)
+            assert content is not None, f'`{filepath}` could not be read'
 
-                content = f.read()
-                self.__cache_files_storebuff[filepath] = content
+            self.__cache_files_storebuff[filepath] = doc.Document(content)
 
-        content = self.__cache_files_storebuff[filepath]
+            self.__cache_files_inputs[filepath] = self._filepath_of(basename, 'epi')
 
-        return content
+        return self.__cache_files_storebuff[filepath]
 
-    def _content_store(self, content: str, basename: str, ext: str):
+    def _document_init(self, basename: str, ext: str, module_basename: str, overwrite: bool):
 
+        # NOTE: the skeleton is buffered instead of being written to disk,
+        # so the file is written (if changed) only on dump
         filepath = self._filepath_of(basename, ext)
-        self.__cache_files_storebuff[filepath] = content
+        if filepath in self.__cache_files_storebuff:
+            return
 
-    def _lookup(self, needle: str, basename: str, ext: str) -> int:
-        return self._content_load(basename, ext).find(needle)
+        if overwrite or not self.__backend.exists(filepath):
+
+            content = emmiter.emit_sekeleton_file(module_basename, ext, bld.Builder()).build()
+            self.__cache_files_storebuff[filepath] = doc.Document(content)
+            self.__cache_files_inputs[filepath] = self._filepath_of(basename, 'epi')
+
+    def _contains(self, anchor: str, basename: str, ext: str) -> bool:
+        return self._document_load(basename, ext).contains(anchor)
 
     def _filepath_of(self, basename: str, ext: str) -> str:
 
@@ -120,87 +186,160 @@ class CodeGenerator:
 
     def _is_dirty(self, basename: str, ext: str):
 
-        filepath = self._filepath_of(basename, ext)
-
-        if not os.path.exists(filepath):
+        if self.__database is None:
             return True
 
-        if filepath not in self.__cache_files_generated:
+        filepath = self._filepath_of(basename, ext)
+        if self._file_is_modified(filepath, self.__database.output(filepath)):
             return True
 
-        checksum = self.__cache_files_generated[filepath]
-        if self._file_checksum(filepath) != checksum:
+        epifilepath = self._filepath_of(basename, 'epi')
+        assert self.__backend.exists(epifilepath)
+
+        if self._input_is_modified(epifilepath):
             return True
 
-        epifilepath = f'{os.path.join(self.__config.dir_input, basename)}.epi'
-        assert os.path.exists(epifilepath)
+        return False
 
-        if epifilepath not in self.__cache_files_generated:
+    def _basename_of(self, symbol: EpiSymbol) -> tuple:
+
+        # TODO: move these functions to the Token class
+        basename = os.path.splitext(symbol.token.relpath)[0]
+        module_basename = os.path.splitext(symbol.token.modulepath)[0]
+
+        # TODO: do the OS-independent file path adoption in a smarter way
+        basename = basename.replace('\\', '/')
+        module_basename = module_basename.replace('\\', '/')
+
+        return basename, module_basename
+
+    def _dependents_of_modified(self) -> set:
+
+        # NOTE: the generated code of a symbol depends on the symbols it refers to (e.g. whether
+        # a property type is an enum or a class), so the input files of every transitive dependent
+        # of the symbols of the modified input files should be regenerated as well
+        if self.__database is None:
+            return set()
+
+        inputs = {}
+        for symbol in self.__symbols:
+
+            basename, _ = self._basename_of(symbol)
+            inputs[symbol.name] = self._filepath_of(basename, 'epi')
+
+        modified = {}
+        symbols_stored = self.__database.symbols()
+
+        names = []
+        for name, epifilepath in inputs.items():
+
+            if epifilepath not in modified:
+                modified[epifilepath] = self._input_is_modified(epifilepath)
+
+            # NOTE: the symbol which was moved to another input file is considered as modified too
+            if modified[epifilepath] or symbols_stored.get(name) != epifilepath:
+                names.append(name)
+
+        dependents = {}
+        for name, refs in self.__dependencies.items():
+
+            for ref in refs:
+                dependents.setdefault(ref, []).append(name)
+
+        visited = set(names)
+        while len(names) > 0:
+
+            for name in dependents.get(names.pop(), []):
+
+                if name not in visited:
+
+                    visited.add(name)
+                    names.append(name)
+
+        return {inputs[name] for name in visited if name in inputs and not modified[inputs[name]]}
+
+    def _file_is_modified(self, filepath: str, entry: tuple) -> bool:
+
+        if entry is None:
             return True
 
-        epichecksum = self.__cache_files_generated[epifilepath]
-        if self._file_checksum(epifilepath) != epichecksum:
+        try:
+            filestat = self._file_stat(filepath)
+        except FileNotFoundError:
             return True
 
-        return False
+        # NOTE: the content is hashed only if the file was touched since it was cached
+        checksum, filestat_cached = entry
+        if filestat == filestat_cached:
+            return False
 
-    def _file_checksum(self, filename: str):
+        return self._file_checksum(filepath, filestat) != checksum
 
-        with open(filename, 'r') as f:
+    def _input_of(self, epifilepath: str, relpath: str) -> tuple:
 
-            content = f.read()
-            digest = hashlib.md5(content.encode()).hexdigest()
+        # NOTE: the input is recorded as of the version its outputs are generated from rather than
+        # the one on the disk, which could have been modified since the input was parsed
+        source = self.__inputs.get(relpath)
+        if source is not None:
+            return source
 
-        return digest
+        time_ns = time.time_ns()
+        filestat = self._file_stat(epifilepath)
 
-    def _inject(self,
-                inj: str,
-                basename: str,
-                ext: str,
-                before: str = None,
-                after: str = None):
+        return self._file_checksum(epifilepath, filestat), filestat, time_ns
 
-        content = self._content_load(basename, ext)
-        if before is None and after is None:
+    def _input_is_modified(self, epifilepath: str) -> bool:
 
-            lbound = len(content)
-            rbound = len(content)
-        else:
-            if before is not None and after is not None:
-                lbound = content.find(after) + len(after)
-                rbound = content.find(before)
+        entry = self.__database.input(epifilepath)
+        if entry is None:
+            return True
 
-            elif before is not None:
-                rbound = content.find(before)
-                lbound = rbound
+        # NOTE: the stat of the racy input isn't trusted, so its content is hashed
+        checksum, filestat, time_ns = entry
+        if _is_racy(filestat, time_ns):
+            filestat = None
 
-            elif after is not None:
-                lbound = content.find(after) + len(after)
-                rbound = lbound
+        return self._file_is_modified(epifilepath, (checksum, filestat))
 
-            if before is not None and content[rbound + len(before):].find(before) != -1:
-                tip = f'There is a duplicating anchor: `{before}`'
-                self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, tip)
+    def _file_stat(self, filepath: str) -> tuple:
 
-            if after is not None and content[lbound + len(after):].find(after) != -1:
-                tip = f'There is a duplicating anchor: `{after}`'
-                self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, tip)
+        return self.__backend.stat(filepath)
 
-        if rbound == -1 or lbound == -1:
+    def _file_checksum(self, filepath: str, filestat: tuple = None):
 
-            tip = f'Can\'t find `{before if before is not None else after}` anchor'
-            self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, tip)
+        if filestat is None:
+            filestat = self._file_stat(filepath)
+
+        # NOTE: every file is hashed at most once per its version
+        key = (filepath, *filestat)
+        if key not in self.__checksums:
+
+            content = self.__backend.read(filepath)
+            self.__checksums[key] = hashlib.md5(content.encode()).hexdigest()
+
+        return self.__checksums[key]
+
+    def _inject(self,
+                inj: str,
+                basename: str,
+                ext: str,
+                before: str = None,
+                after: str = None):
+
+        try:
+            with prof.stage('codegen.inject'):
+                self._document_load(basename, ext).inject(inj, before=before, after=after)
 
-        newcontent = content[:lbound] + inj + content[rbound:]
-        self._content_store(newcontent, basename, ext)
+        except doc.DocumentError as e:
+            self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, str(e))
 
     def _inject_symbol(self, symbolname: str, basename: str, ext: str, injection_skeleton: str, injection_content: str):
 
         assert ext in ['h']
 
-        if self._lookup(f'EPI_GENREGION_END({symbolname})', basename, ext) == -1:
+        if not self._contains(f'EPI_GENREGION_END({symbolname})', basename, ext):
 
-            if self._lookup(f'EPI_GENREGION_BEGIN({symbolname})', basename, ext) != -1:
+            if self._contains(f'EPI_GENREGION_BEGIN({symbolname})', basename, ext):
 
                 tip = f'`EPI_GENREGION_END({symbolname})` is absent while corresponding anchor `EPI_GENREGION_BEGIN({symbolname})` is present'
                 self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, tip)
@@ -213,12 +352,12 @@ class CodeGenerator:
                 before='EPI_NAMESPACE_END()'
             )
 
-        if self._lookup(f'EPI_GENREGION_BEGIN({symbolname})', basename, ext) == -1:
+        if not self._contains(f'EPI_GENREGION_BEGIN({symbolname})', basename, ext):
 
             tip = f'`EPI_GENREGION_BEGIN({symbolname})` is absent'
             self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, tip)
 
-        if self._lookup(f'EPI_GENREGION_END({symbolname})', basename, ext) == -1:
+        if not self._contains(f'EPI_GENREGION_END({symbolname})', basename, ext):
 
             tip = f'`EPI_GENREGION_END({symbolname})` is absent'
             self._push_error(f'{basename}.{ext}', CodeGenerationErrorCode.CorruptedAnchor, tip)
@@ -234,8 +373,7 @@ class CodeGenerator:
 
     def _code_generate_hxx(self, symbol: EpiSymbol, basename: str, module_basename: str):
 
-        with open(self._filepath_of(basename, 'hxx'), 'w') as f:
-            f.write(emmiter.emit_sekeleton_file(module_basename, 'hxx', bld.Builder()).build())
+        self._document_init(basename, 'hxx', module_basename, overwrite=True)
 
         if isinstance(symbol, EpiClass):
             injection = f'\n{emmiter.emit_class_declaration_hidden(symbol, bld.Builder()).build()}'
@@ -246,8 +384,7 @@ class CodeGenerator:
 
     def _code_generate_cxx(self, symbol: EpiSymbol, basename: str, module_basename: str):
 
-        with open(self._filepath_of(basename, 'cxx'), 'w') as f:
-            f.write(emmiter.emit_sekeleton_file(module_basename, 'cxx', bld.Builder()).build())
+        self._document_init(basename, 'cxx', module_basename, overwrite=True)
 
         if isinstance(symbol, EpiClass):
             injection = f'{emmiter.emit_class_serialization(symbol, bld.Builder()).build()}\n'
@@ -261,10 +398,7 @@ class CodeGenerator:
 
     def _code_generate_cpp(self, symbol: EpiSymbol, basename: str, module_basename: str):
 
-        filepath = self._filepath_of(basename, 'cpp')
-        if not os.path.exists(filepath):
-            with open(filepath, 'w') as f:
-                f.write(emmiter.emit_sekeleton_file(module_basename, 'cpp', bld.Builder()).build())
+        self._document_init(basename, 'cpp', module_basename, overwrite=False)
 
         injection = f'\n{emmiter.emit_include_section(module_basename, "cpp", bld.Builder()).nl().build()}'
         self._inject(injection,
@@ -275,10 +409,7 @@ class CodeGenerator:
 
     def _code_generate_h(self, symbol: EpiSymbol, basename: str, module_basename: str):
 
-        filepath = self._filepath_of(basename, 'h')
-        if not os.path.exists(filepath):
-            with open(filepath, 'w') as f:
-                f.write(emmiter.emit_sekeleton_file(module_basename, 'h', bld.Builder()).build())
+        self._document_init(basename, 'h', module_basename, overwrite=False)
 
         injection = f'\n{emmiter.emit_include_section(module_basename, "h", bld.Builder()).nl().build()}'
         self._inject(injection,
@@ -315,37 +446,162 @@ class CodeGenerator:
             injection_content = f'\n{emmiter.emit_enum_declaration(symbol, bld.Builder()).nl().build()}'
             self._inject_symbol(symbol.name, basename, 'h', injection_skeleton, injection_content)
 
+    def _dirty_of(self, basename: str, symbols: list) -> dict:
+
+        epifilepath = self._filepath_of(basename, 'epi')
+
+        # NOTE: the dirtiness of the outputs is decided once per input file
+        # before any of its symbols is generated
+        with prof.stage('codegen.dirty'):
+
+            dependent = epifilepath in self.__dirty_dependents
+            dirty = {ext: dependent or self._is_dirty(basename, ext) for ext in ['hxx', 'cxx', 'cpp', 'h']}
+
+            if self.__database is not None:
+
+                checksum, filestat, time_ns = self._input_of(epifilepath, symbols[0].token.relpath)
+
+                # NOTE: the entry which is still the same keeps its time, so the unmodified
+                # inputs aren't rewritten on every build (unless their entries are racy)
+                entry = self.__database.input(epifilepath)
+                if entry is not None and entry[:2] == (checksum, filestat) and not _is_racy(*entry[1:]):
+                    time_ns = entry[2]
+
+                self.__database.input_store(epifilepath, checksum, filestat, time_ns)
+
+        prof.count('outputs_dirty', sum(dirty.values()))
+        prof.count('outputs_clean', len(dirty) - sum(dirty.values()))
+
+        self.__cache_symbols[epifilepath] = [symbol.name for symbol in symbols]
+
+        return dirty
+
+    def _code_generate_file(self, basename: str, module_basename: str, symbols: list, dirty: dict):
+
+        # NOTE: the injection is profiled as a nested stage, so the self time of this stage is the emission
+        with prof.stage('codegen.emit'):
+
+            for symbol in symbols:
+
+                if dirty['hxx']:
+                    self._code_generate_hxx(symbol, basename, module_basename)
+
+                if dirty['cxx']:
+                    self._code_generate_cxx(symbol, basename, module_basename)
+
+                if dirty['cpp']:
+                    self._code_generate_cpp(symbol, basename, module_basename)
+
+                if dirty['h']:
+                    self._code_generate_h(symbol, basename, module_basename)
+
     def code_generate(self) -> list:
 
-        for symbol in self.__symbols:
+        # NOTE: the database could outlive the code generator (see `Backend.database`),
+        # so the inputs recorded by the failed generation shouldn't be seen as generated
+        try:
+            errors = self._code_generate()
+
+        except BaseException:
+
+            if self.__database is not None:
+                self.__database.rollback()
 
-            # TODO: move these functions to the Token class
-            basename = os.path.splitext(symbol.token.relpath)[0]
-            module_basename = os.path.splitext(symbol.token.modulepath)[0]
+            raise
 
-            # TODO: do the OS-independent file path adoption in a smarter way
-            basename = basename.replace('\\', '/')
-            module_basename = module_basename.replace('\\', '/')
+        if len(errors) > 0 and self.__database is not None:
+            self.__database.rollback()
 
-            os.makedirs(os.path.dirname(os.path.join(self.__config.dir_output, basename)), exist_ok=True)
-            os.makedirs(os.path.dirname(os.path.join(self.__config.dir_output_build, basename)), exist_ok=True)
+        return errors
 
-            if self._is_dirty(basename, 'hxx'):
-                self._code_generate_hxx(symbol, basename, module_basename)
+    def _code_generate(self) -> list:
 
-            if self._is_dirty(basename, 'cxx'):
-                self._code_generate_cxx(symbol, basename, module_basename)
+        with prof.stage('codegen.dirty'):
+            self.__dirty_dependents = self._dependents_of_modified()
 
-            if self._is_dirty(basename, 'cpp'):
-                self._code_generate_cpp(symbol, basename, module_basename)
+        # NOTE: the symbols are grouped by the input file they are defined in (keeping their order),
+        # since every input file is the unit of work which produces the same set of the outputs
+        files = {}
+        for symbol in self.__symbols:
+            files.setdefault(self._basename_of(symbol), []).append(symbol)
+
+        units = []
+        for (basename, module_basename), symbols in files.items():
 
-            if self._is_dirty(basename, 'h'):
-                self._code_generate_h(symbol, basename, module_basename)
+            dirty = self._dirty_of(basename, symbols)
+            if any(dirty.values()):
+                units.append((basename, module_basename, symbols, dirty))
 
-            if self.__config.caching:
+        if self.__config.jobs <= 1 or len(units) <= 1:
 
-                # TODO: move in the other place
-                filepath = self._filepath_of(basename, 'epi')
-                self.__cache_files_generated[filepath] = self._file_checksum(filepath)
+            for unit in units:
+                self._code_generate_file(*unit)
+
+        else:
+            self._code_generate_parallel(units)
 
         return self.__codegen_erros
+
+    def _code_generate_parallel(self, units: list):
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        jobs = min(self.__config.jobs, len(units))
+        chunksize = max(1, len(units) // (jobs * 4))
+
+        configs = [self.__config] * len(units)
+
+        # NOTE: the workers are isolated from the backend, so the outputs which aren't overwritten
+        # are read here and passed along with the symbols
+        files = []
+        for basename, _, _, dirty in units:
+
+            files_unit = {}
+            for ext in (ext for ext in ['cpp', 'h'] if dirty[ext]):
+
+                filepath = self._filepath_of(basename, ext)
+                content = self.__backend.read(filepath)
+
+                if content is not None:
+                    files_unit[filepath] = content
+
+            files.append(files_unit)
+
+        # NOTE: `map` yields the results in the order of `units`, so the outputs are dumped
+        # in the same order and the same error is reported as in the serial run
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+
+            with prof.stage('codegen.emit'):
+                results = list(executor.map(_code_generate_unit, configs, *zip(*units), files, chunksize=chunksize))
+
+        for (basename, _, _, _), (contents, errors) in zip(units, results):
+
+            if len(errors) > 0:
+
+                self.__codegen_erros.extend(errors)
+                raise CodeGenerationErrorFatal()
+
+            # NOTE: the documents are serialized to be passed from the workers (a linked list of nodes
+            # is much heavier to pickle), so they are parsed back to keep the buffer of the same type
+            for filepath, content in contents.items():
+
+                self.__cache_files_storebuff[filepath] = doc.Document(content)
+                self.__cache_files_inputs[filepath] = self._filepath_of(basename, 'epi')
+
+    def _contents(self) -> dict:
+        return {filepath: str(document) for filepath, document in self.__cache_files_storebuff.items()}
+
+
+def _code_generate_unit(config: EpiGenConfig, basename: str, module_basename: str, symbols: list, dirty: dict, files: dict) -> tuple:
+
+    # NOTE: runs in a worker process, so everything passed and returned from here should be picklable,
+    # the dirtiness is already decided by the parent process, so the build database isn't touched here
+    backend = bk.MemoryBackend(files, passthrough=False)
+    codegen = CodeGenerator(symbols, dataclasses.replace(config, caching=False, jobs=1), backend=backend)
+
+    try:
+        codegen._code_generate_file(basename, module_basename, symbols, dirty)
+    except CodeGenerationErrorFatal:
+        pass
+
+    return codegen._contents(), codegen.errors
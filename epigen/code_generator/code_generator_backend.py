@@ -0,0 +1,206 @@
+from epigen import profiler as prof
+
+from epigen.code_generator import code_generator_database as db
+from epigen.code_generator import code_generator_writer as wrt
+
+import os
+import abc
+import time
+
+
+class Backend(abc.ABC):
+
+    def __init__(self):
+
+        self.__bytes_written = 0
+        self.__seconds = 0.0
+
+    @property
+    def bytes_written(self) -> int:
+        return self.__bytes_written
+
+    @property
+    def seconds(self) -> float:
+        return self.__seconds
+
+    @property
+    def throughput(self) -> float:
+        return self.__bytes_written / self.__seconds if self.__seconds > 0.0 else 0.0
+
+    @abc.abstractmethod
+    def read(self, path: str) -> str:
+        pass
+
+    @abc.abstractmethod
+    def exists(self, path: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def stat(self, path: str) -> tuple:
+        pass
+
+    @abc.abstractmethod
+    def database(self, path: str, fingerprint: str) -> db.BuildDatabase:
+        pass
+
+    @abc.abstractmethod
+    def _write(self, outputs: list) -> tuple:
+        pass
+
+    def write(self, outputs: list) -> tuple:
+
+        time_start = time.perf_counter()
+        written, skipped, nbytes = self._write(outputs)
+
+        self.__bytes_written += nbytes
+        self.__seconds += time.perf_counter() - time_start
+
+        prof.count('bytes_written', nbytes)
+
+        return written, skipped
+
+
+class FileSystemBackend(Backend):
+
+    def __init__(self, fsync: bool = False):
+
+        super().__init__()
+
+        self.__writer = wrt.OutputWriter(fsync=fsync)
+        self.__databases = {}
+
+    def read(self, path: str) -> str:
+
+        try:
+            with open(path, 'r') as f:
+                return f.read()
+
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def stat(self, path: str) -> tuple:
+
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def database(self, path: str, fingerprint: str) -> db.BuildDatabase:
+
+        # NOTE: the database is loaded once per backend, so the backend which is kept
+        # between the builds (e.g. by the watch workspace) doesn't reload it on every build
+        database = self.__databases.get(os.path.abspath(path))
+        if database is None or database.fingerprint != fingerprint:
+
+            database = db.BuildDatabase(path, fingerprint)
+            self.__databases[os.path.abspath(path)] = database
+
+        return database
+
+    def _write(self, outputs: list) -> tuple:
+
+        bytes_written = self.__writer.bytes_written
+        written, skipped = self.__writer.write(outputs)
+
+        return written, skipped, self.__writer.bytes_written - bytes_written
+
+
+class MemoryBackend(Backend):
+
+    def __init__(self, files: dict = None, passthrough: bool = True):
+
+        super().__init__()
+
+        # NOTE: the written files are kept in memory, while the rest of the files (e.g. the inputs)
+        # are read from the filesystem unless the backend is isolated from it
+        self.__files = {}
+        self.__mtime = 0
+        self.__passthrough = passthrough
+        self.__databases = {}
+
+        for path, content in (files or {}).items():
+            self._store(path, content)
+
+    @property
+    def files(self) -> dict:
+        return {path: content for path, (content, _) in self.__files.items()}
+
+    def _key(self, path: str) -> str:
+        return os.path.abspath(path)
+
+    def _store(self, path: str, content: str):
+
+        # NOTE: every write gets a distinct mtime, so the modification is never missed
+        # by the stat-based checks no matter how fast the writes follow each other
+        self.__mtime = max(time.time_ns(), self.__mtime + 1)
+        self.__files[self._key(path)] = (content, self.__mtime)
+
+    def read(self, path: str) -> str:
+
+        entry = self.__files.get(self._key(path))
+        if entry is not None:
+            return entry[0]
+
+        if not self.__passthrough:
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                return f.read()
+
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def exists(self, path: str) -> bool:
+        return self._key(path) in self.__files or (self.__passthrough and os.path.exists(path))
+
+    def stat(self, path: str) -> tuple:
+
+        entry = self.__files.get(self._key(path))
+        if entry is not None:
+            return len(entry[0].encode()), entry[1]
+
+        if not self.__passthrough:
+            raise FileNotFoundError(path)
+
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def database(self, path: str, fingerprint: str) -> db.BuildDatabase:
+
+        # NOTE: the database outlives the code generator, the same way the file on the disk does
+        database = self.__databases.get(self._key(path))
+        if database is None or database.fingerprint != fingerprint:
+
+            database = db.BuildDatabase(db.BuildDatabase.MEMORY, fingerprint)
+            self.__databases[self._key(path)] = database
+
+        return database
+
+    def _write(self, outputs: list) -> tuple:
+
+        written = []
+        skipped = []
+
+        nbytes = 0
+        for path, content in outputs:
+
+            if self.read(path) == content:
+
+                skipped.append(path)
+                continue
+
+            self._store(path, content)
+            written.append(path)
+
+            nbytes += len(content.encode())
+
+        return written, skipped, nbytes
+
+    def flush(self, backend: Backend = None) -> tuple:
+
+        # NOTE: the files which are the same on the disk are skipped by the filesystem backend,
+        # so only the difference is written
+        backend = backend if backend is not None else FileSystemBackend()
+        return backend.write(sorted(self.files.items()))
@@ -1,3 +1,71 @@
+import os
+import re
+
+
+class Template:
+
+    RE_PLACEHOLDER = re.compile(r'\$\{(\w+)\}')
+
+    def __init__(self, content: str):
+
+        # NOTE: every line is split into the literal segments interleaved with the placeholder names
+        # (the segments of the odd indices), the lines without placeholders are kept as a single literal
+        self.lines = [Template.RE_PLACEHOLDER.split(line) for line in content.splitlines()]
+        self.placeholders = frozenset(name for segments in self.lines for name in segments[1::2])
+
+    def render(self, kwargs: dict) -> list:
+
+        lines = []
+        for segments in self.lines:
+
+            if len(segments) == 1:
+
+                lines.append(segments[0])
+                continue
+
+            # NOTE: the placeholders which aren't provided are left as is
+            segments = segments[:]
+            for i in range(1, len(segments), 2):
+
+                name = segments[i]
+                segments[i] = kwargs[name] if name in kwargs else f'${{{name}}}'
+
+            lines.append(''.join(segments))
+
+        return lines
+
+
+def _templates() -> dict:
+
+    templates = {}
+
+    dirname = os.path.join(os.path.dirname(__file__), 'templates')
+    for root, _, files in os.walk(dirname):
+        for filename in (f for f in files if f.endswith('.txt')):
+
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, dirname)[:-len('.txt')].replace(os.sep, '/')
+
+            with open(path, 'r') as f:
+                templates[name] = Template(f.read())
+
+    return templates
+
+
+_TEMPLATES = None
+
+
+def _template(name: str) -> Template:
+
+    global _TEMPLATES
+
+    # NOTE: all the templates are loaded and parsed once per process on the first use
+    if _TEMPLATES is None:
+        _TEMPLATES = _templates()
+
+    return _TEMPLATES[name]
+
+
 class Builder:
 
     def __init__(self):
@@ -47,21 +115,12 @@ class Builder:
 
     def template(self, name: str, **kwargs):
 
-        import os
-
-        dirname = os.path.dirname(__file__)
-        path = f'{dirname}/templates/{name}.txt'
-        with open(path, 'r') as f:
-            content = f.read()
+        template = _template(name)
 
         for k in kwargs:
-            assert content.find(f'${{{k}}}') != -1, f'The provided placeholder=`{k}` should be presented in a template at least once'
-
-        for line in content.splitlines():
-
-            for k, v in kwargs.items():
-                line = line.replace(f'${{{k}}}', v)
+            assert k in template.placeholders, f'The provided placeholder=`{k}` should be presented in a template at least once'
 
+        for line in template.render(kwargs):
             self.line(line)
 
         return self
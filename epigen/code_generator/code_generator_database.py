@@ -0,0 +1,203 @@
+from epigen import fingerprint as fp
+
+from epigen.config import EpiGenConfig
+
+import os
+import sqlite3
+import hashlib
+import contextlib
+
+
+class BuildDatabase:
+
+    # NOTE: bump it whenever the tables layout changes
+    SCHEMA = 2
+
+    # NOTE: the database which lives as long as this object does
+    MEMORY = ':memory:'
+
+    TABLES = [
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS inputs (path TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, time_ns INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS outputs (path TEXT PRIMARY KEY, input TEXT NOT NULL, digest TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS symbols (name TEXT PRIMARY KEY, input TEXT NOT NULL)'
+    ]
+
+    def __init__(self, path: str, fingerprint: str):
+
+        self.__path = path
+        self.__fingerprint = fingerprint
+        self.__connection = None
+
+        # NOTE: the rows are loaded once and only the changed ones are written back on commit
+        self.__inputs = {}
+        self.__outputs = {}
+        self.__symbols = {}
+
+        self.__inputs_changed = {}
+        self.__outputs_changed = {}
+        self.__symbols_changed = {}
+        self.__symbols_removed = set()
+
+        try:
+
+            self._open()
+            self._load()
+
+        except sqlite3.DatabaseError:
+
+            # NOTE: a corrupted database is just a cold build
+            self._close()
+
+            if self.__path != BuildDatabase.MEMORY:
+
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self.__path)
+
+            self._open()
+            self._load()
+
+    @property
+    def fingerprint(self) -> str:
+        return self.__fingerprint
+
+    @staticmethod
+    def fingerprint_of(config: EpiGenConfig) -> str:
+
+        # NOTE: the outputs are invalidated whenever the generator itself could produce
+        # a different code: its sources or templates have changed
+        sha = hashlib.sha1()
+        sha.update(f'{BuildDatabase.SCHEMA};{fp.sources(("",))}'.encode())
+        sha.update(f'{config.dir_input};{config.dir_output};{config.dir_output_build}'.encode())
+
+        return sha.hexdigest()
+
+    def _open(self):
+
+        # NOTE: the in-memory database lives as long as its connection does
+        if self.__path == BuildDatabase.MEMORY:
+            self.__connection = sqlite3.connect(self.__path)
+
+    def _close(self):
+
+        if self.__connection is not None:
+
+            self.__connection.close()
+            self.__connection = None
+
+    @contextlib.contextmanager
+    def _connect(self):
+
+        if self.__connection is not None:
+
+            yield self.__connection
+            return
+
+        connection = sqlite3.connect(self.__path)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def _load(self):
+
+        with self._connect() as connection:
+
+            with connection:
+
+                for table in BuildDatabase.TABLES:
+                    connection.execute(table)
+
+                meta = dict(connection.execute('SELECT key, value FROM meta'))
+                if meta.get('schema') != str(BuildDatabase.SCHEMA) or meta.get('fingerprint') != self.__fingerprint:
+
+                    # NOTE: the tables are recreated rather than emptied, since their layout could have been changed
+                    for name in ['inputs', 'outputs', 'symbols']:
+                        connection.execute(f'DROP TABLE {name}')
+
+                    for table in BuildDatabase.TABLES:
+                        connection.execute(table)
+
+                    connection.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+                        ('schema', str(BuildDatabase.SCHEMA)),
+                        ('fingerprint', self.__fingerprint)
+                    ])
+
+                self.__inputs = {path: (digest, (size, mtime_ns), time_ns) for path, digest, size, mtime_ns, time_ns in connection.execute('SELECT * FROM inputs')}
+                self.__outputs = {path: (inputpath, digest, (size, mtime_ns)) for path, inputpath, digest, size, mtime_ns in connection.execute('SELECT * FROM outputs')}
+                self.__symbols = dict(connection.execute('SELECT name, input FROM symbols'))
+
+    def input(self, path: str) -> tuple:
+        return self.__inputs.get(path)
+
+    def input_store(self, path: str, digest: str, filestat: tuple, time_ns: int):
+
+        row = (digest, filestat, time_ns)
+        if self.__inputs.get(path) != row:
+
+            self.__inputs[path] = row
+            self.__inputs_changed[path] = row
+
+    def output(self, path: str) -> tuple:
+
+        row = self.__outputs.get(path)
+        return row[1:] if row is not None else None
+
+    def output_store(self, path: str, inputpath: str, digest: str, filestat: tuple):
+
+        row = (inputpath, digest, filestat)
+        if self.__outputs.get(path) != row:
+
+            self.__outputs[path] = row
+            self.__outputs_changed[path] = row
+
+    def symbols(self) -> dict:
+        return self.__symbols.copy()
+
+    def symbols_store(self, inputpath: str, names: list):
+
+        names_stored = {name for name, name_inputpath in self.__symbols.items() if name_inputpath == inputpath}
+        for name in names_stored.difference(names):
+
+            del self.__symbols[name]
+            self.__symbols_changed.pop(name, None)
+            self.__symbols_removed.add(name)
+
+        for name in names:
+
+            if self.__symbols.get(name) != inputpath:
+
+                self.__symbols[name] = inputpath
+                self.__symbols_changed[name] = inputpath
+                self.__symbols_removed.discard(name)
+
+    def rollback(self):
+
+        # NOTE: the rows are updated in memory as they're stored, so the ones
+        # of the failed build are reloaded from what has been committed
+        self.__inputs_changed = {}
+        self.__outputs_changed = {}
+        self.__symbols_changed = {}
+        self.__symbols_removed = set()
+
+        self._load()
+
+    def commit(self):
+
+        with self._connect() as connection:
+
+            with connection:
+
+                connection.executemany('INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?, ?)', [
+                    (path, digest, *filestat, time_ns) for path, (digest, filestat, time_ns) in self.__inputs_changed.items()
+                ])
+                connection.executemany('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?)', [
+                    (path, inputpath, digest, *filestat) for path, (inputpath, digest, filestat) in self.__outputs_changed.items()
+                ])
+                connection.executemany('DELETE FROM symbols WHERE name = ?', [(name,) for name in self.__symbols_removed])
+                connection.executemany('INSERT OR REPLACE INTO symbols VALUES (?, ?)', self.__symbols_changed.items())
+
+        self.__inputs_changed = {}
+        self.__outputs_changed = {}
+        self.__symbols_changed = {}
+        self.__symbols_removed = set()
@@ -0,0 +1,135 @@
+import re
+
+
+class DocumentError(Exception):
+    pass
+
+
+class Document:
+
+    # NOTE: every anchor the code generator injects the code relatively to
+    RE_ANCHOR = re.compile(r'EPI_GENREGION_(?:BEGIN|END)\([^)\n]*\)|EPI_NAMESPACE_END\(\)')
+
+    class Node:
+
+        __slots__ = ('text', 'anchor', 'prev', 'next')
+
+        def __init__(self, text: str, anchor: bool):
+
+            self.text = text
+            self.anchor = anchor
+            self.prev = None
+            self.next = None
+
+    def __init__(self, content: str):
+
+        # NOTE: the document is a linked list of the text nodes and the anchor nodes
+        # between a pair of sentinels, so the injections are spliced in place
+        # and the content is serialized once
+        self.__head = Document.Node('', False)
+        self.__tail = Document.Node('', False)
+        self.__head.next = self.__tail
+        self.__tail.prev = self.__head
+
+        self.__anchors = {}
+
+        self._splice(content, self.__tail)
+
+    def __str__(self):
+
+        texts = []
+
+        node = self.__head.next
+        while node is not self.__tail:
+
+            texts.append(node.text)
+            node = node.next
+
+        return ''.join(texts)
+
+    def _splice(self, content: str, node_before: Node):
+
+        def _link(node: Document.Node):
+
+            node.prev = node_before.prev
+            node.next = node_before
+            node_before.prev.next = node
+            node_before.prev = node
+
+        at = 0
+        for m in Document.RE_ANCHOR.finditer(content):
+
+            if m.start() > at:
+                _link(Document.Node(content[at:m.start()], False))
+
+            node = Document.Node(m.group(), True)
+            self.__anchors.setdefault(node.text, []).append(node)
+            _link(node)
+
+            at = m.end()
+
+        if at < len(content):
+            _link(Document.Node(content[at:], False))
+
+    def _unlink(self, node: Node):
+
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+        if node.anchor:
+            self.__anchors[node.text].remove(node)
+
+    def _anchor(self, anchor: str) -> Node:
+
+        nodes = self.__anchors.get(anchor, [])
+        if len(nodes) > 1:
+            raise DocumentError(f'There is a duplicating anchor: `{anchor}`')
+
+        return nodes[0] if len(nodes) > 0 else None
+
+    def contains(self, anchor: str) -> bool:
+        return len(self.__anchors.get(anchor, [])) > 0
+
+    def inject(self, content: str, before: str = None, after: str = None):
+
+        if before is None and after is None:
+
+            self._splice(content, self.__tail)
+            return
+
+        node_before = self._anchor(before) if before is not None else None
+        node_after = self._anchor(after) if after is not None else None
+
+        if before is not None and node_before is None:
+            raise DocumentError(f'Can\'t find `{before}` anchor')
+
+        if after is not None and node_after is None:
+            raise DocumentError(f'Can\'t find `{after}` anchor')
+
+        if node_after is None:
+
+            self._splice(content, node_before)
+            return
+
+        if node_before is None:
+
+            self._splice(content, node_after.next)
+            return
+
+        # NOTE: the region between the anchors is replaced with the content
+        node = node_after.next
+        while node is not node_before:
+
+            if node is self.__tail:
+                raise DocumentError(f'`{before}` anchor precedes `{after}` anchor')
+
+            node = node.next
+
+        node = node_after.next
+        while node is not node_before:
+
+            node_next = node.next
+            self._unlink(node)
+            node = node_next
+
+        self._splice(content, node_before)
@@ -0,0 +1,150 @@
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OutputWriter:
+
+    # NOTE: the writing is bound by the I/O latency (e.g. of a network-mounted build directory)
+    # rather than by the CPU, so the pool is bigger than the number of cores, but still bounded
+    JOBS_MAX = 16
+
+    def __init__(self, jobs: int = None, fsync: bool = False):
+
+        self.__jobs = jobs if jobs is not None else min(OutputWriter.JOBS_MAX, (os.cpu_count() or 1) + 4)
+        self.__fsync = fsync
+
+        self.__bytes_written = 0
+        self.__seconds = 0.0
+
+    @property
+    def bytes_written(self) -> int:
+        return self.__bytes_written
+
+    @property
+    def seconds(self) -> float:
+        return self.__seconds
+
+    @property
+    def throughput(self) -> float:
+        return self.__bytes_written / self.__seconds if self.__seconds > 0.0 else 0.0
+
+    def write(self, outputs: list) -> tuple:
+
+        time_start = time.perf_counter()
+
+        self._makedirs(os.path.dirname(path) for path, _ in outputs)
+
+        if self.__jobs <= 1 or len(outputs) <= 1:
+            results = [self._write(path, content) for path, content in outputs]
+
+        else:
+
+            # NOTE: `map` yields the results in the order of `outputs`, so they are reported in the same order
+            with ThreadPoolExecutor(max_workers=min(self.__jobs, len(outputs))) as executor:
+                results = list(executor.map(lambda output: self._write(*output), outputs))
+
+        written = [path for (path, _), nbytes in zip(outputs, results) if nbytes is not None]
+        skipped = [path for (path, _), nbytes in zip(outputs, results) if nbytes is None]
+
+        self.__bytes_written += sum(n for n in results if n is not None)
+        self.__seconds += time.perf_counter() - time_start
+
+        return written, skipped
+
+    def _makedirs(self, dirpaths):
+
+        # NOTE: `os.makedirs` creates the intermediate directories as well, so only the deepest ones
+        # of the output directories are created (the empty one is the current directory, which exists);
+        # the longer paths go first, so every directory is seen after all of its subdirectories
+        dirpaths = sorted({dirpath for dirpath in dirpaths if dirpath != ''}, key=len, reverse=True)
+
+        leaves = []
+        ancestors = set()
+        for dirpath in dirpaths:
+
+            if dirpath in ancestors:
+                continue
+
+            leaves.append(dirpath)
+
+            parent = os.path.dirname(dirpath)
+            while parent not in ancestors and parent != os.path.dirname(parent):
+
+                ancestors.add(parent)
+                parent = os.path.dirname(parent)
+
+        for dirpath in leaves:
+            os.makedirs(dirpath, exist_ok=True)
+
+    def _read(self, path: str) -> str:
+
+        try:
+            with open(path, 'r') as f:
+                return f.read()
+
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _mktemp(self, path: str) -> tuple:
+
+        # NOTE: unlike `tempfile.mkstemp` (which creates the file with 0600) the file is created with 0666,
+        # so the new output gets the default mode of the process umask applied by the OS,
+        # without the umask being read (and so changed) while the other threads could create files
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        while True:
+
+            pathtmp = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.{os.urandom(6).hex()}.tmp')
+            try:
+                return os.open(pathtmp, flags, 0o666), pathtmp
+            except FileExistsError:
+                continue
+
+    def _write(self, path: str, content: str) -> int:
+
+        # NOTE: a file is rewritten only if its content differs from what is already on disk,
+        # so the files which aren't changed keep their mtime and don't trigger a rebuild
+        if self._read(path) == content:
+            return None
+
+        # NOTE: the content is written into a temporary file next to the target one and then
+        # renamed over it, so the target file is never observed partially written
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = None
+
+        dirpath = os.path.dirname(path)
+        fd, pathtmp = self._mktemp(path)
+        try:
+
+            with os.fdopen(fd, 'w') as f:
+
+                f.write(content)
+
+                if self.__fsync:
+
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            if mode is not None:
+                os.chmod(pathtmp, mode)
+
+            os.replace(pathtmp, path)
+
+        except BaseException:
+
+            os.remove(pathtmp)
+            raise
+
+        if self.__fsync and hasattr(os, 'O_DIRECTORY'):
+
+            # NOTE: the rename itself is durable only once the directory is synced
+            fd = os.open(dirpath, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        return len(content.encode())
@@ -13,6 +13,11 @@ class EpiGenConfig:
     debug: bool = False
     backup: bool = False
     caching: bool = True
+    jobs: int = 1
+    fsync: bool = False
+    profile: bool = False
+    profile_cprofile: bool = False
+    log_stderr: bool = True
 
     ignore_list: List[str] = dataclasses.field(default_factory=list)
 
@@ -0,0 +1,203 @@
+from epigen.config import EpiGenConfig
+
+import os
+import re
+import json
+import time
+import fnmatch
+import logging
+
+
+logger = logging.getLogger('epigen')
+
+# NOTE: the directory modified within this interval before the scan could have been modified again
+# without its mtime being changed (coarse mtime granularity), so it isn't trusted
+_RACY_INTERVAL_NS = 2 * 10 ** 9
+
+
+def _ignore_re(ignore_list: list):
+
+    # NOTE: every pattern is matched at once instead of calling `fnmatch` per pattern per file
+    if len(ignore_list) == 0:
+        return None
+
+    return re.compile('|'.join(fnmatch.translate(os.path.normcase(p)) for p in ignore_list))
+
+
+def _dir_mtime(dirpath: str) -> int:
+
+    try:
+        return os.stat(dirpath).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan(config: EpiGenConfig) -> tuple:
+
+    ignore = _ignore_re(config.ignore_list)
+
+    relpaths = []
+    dirs = {}
+
+    # NOTE: the directories are visited in the same (top-down) order `os.walk` visits them,
+    # so the inputs are registered in the same order
+    stack = ['']
+    while len(stack) > 0:
+
+        reldir = stack.pop()
+        dirpath = os.path.join(config.dir_input, reldir)
+
+        # NOTE: the mtime is taken before the directory is listed, so the entries
+        # added while it's being listed invalidate the cache
+        dirs[reldir] = _dir_mtime(dirpath)
+
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+
+                if not entry.is_symlink():
+                    subdirs.append(os.path.join(reldir, entry.name))
+
+                continue
+
+            if not entry.name.endswith('epi'):
+                continue
+
+            relpath = os.path.normpath(os.path.join(reldir, entry.name))
+            if ignore is not None and ignore.match(os.path.normcase(relpath)) is not None:
+
+                logger.debug(f'Ignoring: `{relpath}`')
+                continue
+
+            relpaths.append(relpath)
+
+        stack.extend(reversed(subdirs))
+
+    return relpaths, dirs
+
+
+def _load(path: str, key: list) -> list:
+
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(manifest, dict) or manifest.get('key') != key:
+        return None
+
+    time_scan = manifest['time_scan']
+    for reldir, mtime in manifest['dirs'].items():
+
+        if mtime is not None and mtime >= time_scan - _RACY_INTERVAL_NS:
+            return None
+
+        if _dir_mtime(os.path.join(key[1], reldir)) != mtime:
+            return None
+
+    return manifest['inputs']
+
+
+def _store(path: str, key: list, relpaths: list, dirs: dict, time_scan: int):
+
+    dirpath = os.path.dirname(path)
+    if not os.path.isdir(dirpath):
+        return
+
+    manifest = {
+        'key': key,
+        'time_scan': time_scan,
+        'dirs': dirs,
+        'inputs': relpaths
+    }
+
+    import tempfile
+
+    fd, pathtmp = tempfile.mkstemp(prefix='.epigen-discovery.', suffix='.tmp', dir=dirpath)
+    try:
+
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+
+        os.replace(pathtmp, path)
+
+    except OSError:
+
+        # NOTE: the manifest is just a cache, the discovery works without it
+        os.remove(pathtmp)
+
+
+def discover(config: EpiGenConfig) -> list:
+
+    # NOTE: the directory mtime changes whenever an entry is added, removed or renamed in it,
+    # so the cached manifest is revalidated by stat'ing the directories only
+    path = os.path.join(config.dir_output_build, 'epigen-discovery.json')
+
+    # NOTE: the query modes shouldn't pay for hashing the sources, so the manifest
+    # is keyed by the stat of the discovery itself, which is all it depends on
+    st = os.stat(__file__)
+    key = [[st.st_size, st.st_mtime_ns], os.path.abspath(config.dir_input), config.ignore_list]
+
+    if config.caching:
+
+        relpaths = _load(path, key)
+        if relpaths is not None:
+            return relpaths
+
+    time_scan = time.time_ns()
+    relpaths, dirs = _scan(config)
+
+    if config.caching:
+        _store(path, key, relpaths, dirs, time_scan)
+
+    return relpaths
+
+
+def _inputs_of(config: EpiGenConfig, relpaths: list) -> list:
+    return [os.path.abspath(os.path.join(config.dir_input, relpath)) for relpath in relpaths]
+
+
+def _outputs_of(config: EpiGenConfig, relpaths: list) -> list:
+
+    outputs = []
+    for relpath in relpaths:
+
+        path_output = os.path.join(config.dir_output, relpath)
+        basename_output = os.path.splitext(path_output)[0]
+        outputs += [f'{basename_output}.{ext}' for ext in ['h', 'cpp']]
+
+        path_output_build = os.path.join(config.dir_output_build, relpath)
+        basename_output_build = os.path.splitext(path_output_build)[0]
+        outputs += [f'{basename_output_build}.{ext}' for ext in ['hxx','cxx']]
+
+    return outputs
+
+
+def inputs(config: EpiGenConfig) -> list:
+    return _inputs_of(config, discover(config))
+
+
+def outputs(config: EpiGenConfig) -> list:
+    return _outputs_of(config, discover(config))
+
+
+def dependencies(config: EpiGenConfig) -> list:
+
+    # NOTE: the input directory is discovered once for both the inputs and the outputs
+    relpaths = discover(config)
+    return _inputs_of(config, relpaths) + _outputs_of(config, relpaths)
@@ -1,69 +1,59 @@
 from epigen.tokenizer import Tokenizer
 
 from epigen.idlparser import idlparser_base as idl
+from epigen.idlparser import idlparser_cache as idlcache
 from epigen.linker import linker as ln
 from epigen.code_generator import code_generator as cgen
+from epigen.code_generator import code_generator_backend as bk
+from epigen import discovery
+from epigen import profiler as prof
 
 from epigen.config import EpiGenConfig
 from epigen.config import EpiGenManifest
 
+from typing import List
+from typing import Dict
+
 import os
 import logging
 import shutil
+import time
+import threading
 import fnmatch
+import contextlib
+import dataclasses
 
 
-logger = logging.getLogger()
-
+# NOTE: the handlers are attached to the package logger rather than to the root one
+# and are removed once the run is over, so the caller's logging isn't affected
+logger = logging.getLogger('epigen')
 
-def epigen_inputs(config: EpiGenConfig) -> list:
 
-    inputs = []
-    for root, _, files in os.walk(config.dir_input):
+@dataclasses.dataclass
+class EpiGenResult:
 
-        for epifile in filter(lambda f: f.endswith('epi'), files):
+    success: bool = False
+    errors: List[str] = dataclasses.field(default_factory=list)
 
-            relpath = os.path.join(os.path.relpath(root, config.dir_input), epifile)
-            relpath = os.path.normpath(relpath)
-            if any(fnmatch.fnmatch(relpath, p) for p in config.ignore_list):
+    parsed: int = 0
+    cached: int = 0
+    written: List[str] = dataclasses.field(default_factory=list)
+    skipped: List[str] = dataclasses.field(default_factory=list)
 
-                logger.debug(f'Ignoring: `{relpath}`')
-                continue
+    seconds: float = 0.0
+    timings: Dict[str, float] = dataclasses.field(default_factory=dict)
 
-            abspath = os.path.join(config.dir_input, relpath)
-            abspath = os.path.abspath(abspath)
-            inputs.append(abspath)
 
-    return inputs
+def epigen_inputs(config: EpiGenConfig) -> list:
+    return discovery.inputs(config)
 
 
 def epigen_outputs(config: EpiGenConfig) -> list:
-
-    outputs = []
-    for root, _, files in os.walk(config.dir_input):
-
-        for epifile in filter(lambda f: f.endswith('epi'), files):
-
-            relpath = os.path.join(os.path.relpath(root, config.dir_input), epifile)
-            relpath = os.path.normpath(relpath)
-            if any(fnmatch.fnmatch(relpath, p) for p in config.ignore_list):
-
-                logger.debug(f'Ignoring: `{relpath}`')
-                continue
-
-            path_output = os.path.join(config.dir_output, relpath)
-            basename_output = os.path.splitext(path_output)[0]
-            outputs += [f'{basename_output}.{ext}' for ext in ['h', 'cpp']]
-
-            path_output_build = os.path.join(config.dir_output_build, relpath)
-            basename_output_build = os.path.splitext(path_output_build)[0]
-            outputs += [f'{basename_output_build}.{ext}' for ext in ['hxx','cxx']]
-
-    return outputs
+    return discovery.outputs(config)
 
 
 def epigen_dependencies(config: EpiGenConfig) -> list:
-    return epigen_inputs(config) + epigen_outputs(config)
+    return discovery.dependencies(config)
 
 
 def _ignore_on_copy(dirname, files):
@@ -78,55 +68,191 @@ def _ignore_on_copy(dirname, files):
     return filtered
 
 
-def _init_logger(log_level: int, outdir: str):
+# NOTE: the logger is shared by the builds which run concurrently, so it's set up by the first
+# of them and restored by the last one (the records are filtered by the handlers of every build)
+_LOGGING_LOCK = threading.Lock()
+_LOGGING_STATE = {'builds': 0, 'level': logging.NOTSET, 'propagate': True}
+
 
-    logger.setLevel(log_level)
+@contextlib.contextmanager
+def _logging(config: EpiGenConfig, logfile: bool = True):
 
+    log_level = logging.DEBUG if config.debug else logging.INFO
     formatter = logging.Formatter('[%(levelname)5s] %(message)s')
 
-    stderr_handler = logging.StreamHandler()
-    stderr_handler.setLevel(logging.INFO)
-    stderr_handler.setFormatter(formatter)
+    handlers = []
 
-    file_handler = logging.FileHandler(os.path.join(outdir, 'epigen.log'), mode='w')
-    file_handler.setLevel(log_level)
-    file_handler.setFormatter(formatter)
+    if config.log_stderr:
 
-    logger.addHandler(stderr_handler)
-    logger.addHandler(file_handler)
+        stderr_handler = logging.StreamHandler()
+        stderr_handler.setLevel(logging.INFO)
+        handlers.append(stderr_handler)
 
+    if logfile:
 
-def epigen(config: EpiGenConfig, manifest: EpiGenManifest):
+        file_handler = logging.FileHandler(os.path.join(config.dir_output_build, 'epigen.log'), mode='w')
+        file_handler.setLevel(log_level)
+        handlers.append(file_handler)
 
-    os.makedirs(config.dir_output, exist_ok=True)
-    os.makedirs(config.dir_output_build, exist_ok=True)
+    # NOTE: the build which has nothing to log to leaves the records to the handlers of the embedder
+    if len(handlers) == 0:
 
-    if config.debug:
+        yield
+        return
 
-        _init_logger(logging.DEBUG, config.dir_output_build)
-        logger.info(f'Debug mode enabled')
+    with _LOGGING_LOCK:
 
-    else:
-        _init_logger(logging.INFO, config.dir_output_build)
+        # NOTE: the records are passed to the handlers of the builds only, otherwise
+        # the embedder which has a root handler would see every record twice
+        if _LOGGING_STATE['builds'] == 0:
 
-    logger.info(f'Input Dir: {config.dir_input}')
-    logger.info(f'Output Dir: {config.dir_output}')
-    logger.info(f'Output CXX HXX Dir: {config.dir_output_build}')
-    logger.info(f'Ignore-list: {";".join(config.ignore_list)}')
-    logger.info(f'Caching is enabled: {config.caching}')
-    logger.info(f'Modules: {";".join(manifest.modules)}')
+            _LOGGING_STATE.update(level=logger.level, propagate=logger.propagate)
+            logger.setLevel(logging.DEBUG)
+            logger.propagate = False
 
-    if config.backup:
+        _LOGGING_STATE['builds'] += 1
 
-        from tempfile import TemporaryDirectory
-        from tempfile import gettempdir
-        from uuid import uuid1
+        for handler in handlers:
 
-        backupdir = f'{gettempdir()}/EpiCodeGenerator-{uuid1()}-backup'
-        logger.info(f'Backup <input dir> into {backupdir}')
-        shutil.copytree(config.dir_input, backupdir, ignore=_ignore_on_copy)
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+    try:
+        yield
+
+    finally:
+
+        with _LOGGING_LOCK:
+
+            for handler in handlers:
+
+                logger.removeHandler(handler)
+                handler.close()
+
+            _LOGGING_STATE['builds'] -= 1
+            if _LOGGING_STATE['builds'] == 0:
+
+                logger.setLevel(_LOGGING_STATE['level'])
+                logger.propagate = _LOGGING_STATE['propagate']
+
+
+@contextlib.contextmanager
+def _stage(name: str, timings: dict):
+
+    time_start = time.perf_counter()
+    try:
+
+        with prof.stage(name):
+            yield
+
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - time_start
+
+
+def _tokens_timed(tokens, stats: dict):
+
+    # NOTE: the tokens are scanned lazily while the parser pulls them,
+    # so only the time spent on pulling the next token is accounted to the tokenizer
+    it = iter(tokens)
+    while True:
+
+        time_start = time.perf_counter()
+        try:
+            token = next(it)
+
+        except StopIteration:
+            stats['tokenize'] += time.perf_counter() - time_start
+            return
+
+        stats['tokenize'] += time.perf_counter() - time_start
+        stats['tokens'] += 1
+
+        yield token
+
+
+def _parse(abspath: str, relpath: str, modulepath: str, config: EpiGenConfig) -> tuple:
+
+    # NOTE: runs in a worker process when `config.jobs > 1`, so everything
+    # returned from here should be picklable
+    stats = {'tokenize': 0.0, 'parse': 0.0, 'tokens': 0} if config.profile else None
+    time_start = time.perf_counter()
+
+    # NOTE: the input is stat'ed before it's read, so the file modified while it's parsed is recorded
+    # with the stale stat along with the digest of the parsed version, and so is parsed again by the next build
+    time_stat = time.time_ns()
+    st = os.stat(abspath)
+    filestat = (st.st_size, st.st_mtime_ns)
+
+    if config.caching:
+
+        cache = idlcache.IDLParserCache(os.path.join(config.dir_output_build, 'epigen-cache-idl'))
+        digest = idlcache.IDLParserCache.digest(abspath)
+
+        cached = cache.load(relpath, modulepath, digest)
+        if cached is not None:
+
+            if stats is not None:
+                stats['parse'] = time.perf_counter() - time_start
+
+            registry_local, errors_syntax = cached
+            return registry_local, errors_syntax, [], True, stats, (digest, filestat, time_stat)
+
+    with Tokenizer(abspath, relpath, modulepath) as tokenizer:
+
+        # NOTE: the token list is materialized only to be dumped in debug mode,
+        # otherwise the parser pulls the tokens straight from the scanner
+        tokens = tokenizer.tokenize() if config.debug else []
+
+        tokens_parsed = tokens if config.debug else tokenizer.tokenize_iter()
+        if stats is not None:
+            tokens_parsed = _tokens_timed(tokens_parsed, stats)
+
+        parser = idl.IDLParser(tokens_parsed)
+        registry_local, errors_syntax = parser.parse()
+
+    # NOTE: the file could be modified after it was hashed for the cache lookup,
+    # so the parsed version is known by the digest of the text which was scanned only
+    digest = tokenizer.digest
+
+    if config.caching:
+        cache.store(relpath, modulepath, digest, registry_local, errors_syntax)
+
+    if stats is not None:
+        stats['parse'] = time.perf_counter() - time_start - stats['tokenize']
+
+    return registry_local, errors_syntax, tokens, False, stats, (digest, filestat, time_stat)
+
+
+def _prune(config: EpiGenConfig, units: list):
+
+    if config.caching:
+
+        cache = idlcache.IDLParserCache(os.path.join(config.dir_output_build, 'epigen-cache-idl'))
+        cache.prune([relpath for _, relpath, _ in units])
+
+
+def _parse_units(units: list, config: EpiGenConfig):
+
+    abspaths, relpaths, modulepaths = zip(*units) if len(units) > 0 else ([], [], [])
+    configs = [config] * len(units)
+
+    if config.jobs <= 1 or len(units) <= 1:
+
+        yield from map(_parse, abspaths, relpaths, modulepaths, configs)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = min(config.jobs, len(units))
+    chunksize = max(1, len(units) // (jobs * 4))
+
+    # NOTE: `map` yields the results in the order of `units`, so the registration
+    # order (and so the order of the reported errors) is the same as in the serial run
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(_parse, abspaths, relpaths, modulepaths, configs, chunksize=chunksize)
 
-    linker = ln.Linker()
+
+def _units(config: EpiGenConfig, manifest: EpiGenManifest, inputs: list) -> tuple:
 
     modules = manifest.modules[:]
 
@@ -141,8 +267,8 @@ def epigen(config: EpiGenConfig, manifest: EpiGenManifest):
     modules = [modulepath_dir_input(m) for m in modules]
     modules.sort(reverse=True)
 
-    parsing_is_successful = True
-    for abspath in epigen_inputs(config):
+    units = []
+    for abspath in inputs:
 
         relpath = os.path.relpath(abspath, config.dir_input)
         relpath = os.path.normpath(relpath)
@@ -152,54 +278,214 @@ def epigen(config: EpiGenConfig, manifest: EpiGenManifest):
         module = next((m for m in modules if m in relpath_dir_input), None)
         if module is None:
 
-            logger.fatal(f"Error while defining a module for `{relpath_dir_input}`")
-            exit(-1)
+            error = f'Error while defining a module for `{relpath_dir_input}`'
+            logger.fatal(error)
+
+            return None, [error]
 
         modulepath = os.path.relpath(relpath_dir_input, module)
         modulepath = os.path.normpath(modulepath)
         modulepath = os.path.join(os.path.basename(module), modulepath)
 
-        logger.info(f'Parsing: `{modulepath}`')
+        units.append((abspath, relpath, modulepath))
 
-        tokenizer = Tokenizer(abspath, relpath, modulepath)
-        tokens = tokenizer.tokenize()
+    return units, []
 
-        for t in tokens:
-            logger.debug(str(t))
 
-        parser = idl.IDLParser(tokens)
-        registry_local, errors_syntax = parser.parse()
+def _log_errors(errors: list) -> list:
+
+    errors = [str(e) for e in errors]
+    for e in errors:
+        logger.error(e)
+
+    return errors
+
+
+def _log_parsed(modulepath: str, errors_syntax: list, tokens: list, cached: bool) -> list:
+
+    logger.info(f'Parsing: `{modulepath}`{" (cached)" if cached else ""}')
+
+    for t in tokens:
+        logger.debug(str(t))
+
+    return _log_errors(errors_syntax)
+
+
+def _link(linker: ln.Linker, timings: dict = None) -> list:
+
+    with _stage('link', timings if timings is not None else {}):
+        errors_linkage = linker.link()
+
+    return _log_errors(errors_linkage)
+
+
+def _generate(config: EpiGenConfig, linker: ln.Linker, backend: bk.Backend = None, timings: dict = None, inputs: dict = None) -> tuple:
+
+    # NOTE: returns the errors along with the written and the skipped outputs,
+    # nothing is written unless every symbol is generated successfully
+    timings = timings if timings is not None else {}
+
+    with _stage('codegen', timings):
+
+        symbols = list(linker.registry.values())
+        codegen = cgen.CodeGenerator(symbols, config, linker.dependencies(), backend, inputs)
+
+        try:
+            errors_codegen = codegen.code_generate()
+        except cgen.CodeGenerationErrorFatal:
+            errors_codegen = codegen.errors
 
-        for e in errors_syntax:
+    errors_codegen = _log_errors(errors_codegen)
+    if len(errors_codegen) > 0:
+        return errors_codegen, [], []
 
-            logger.error(str(e))
-            parsing_is_successful = False
+    backend = codegen.backend
+    bytes_written, seconds = backend.bytes_written, backend.seconds
 
-        linker.register(registry_local)
+    with _stage('dump', timings):
+        written, skipped = codegen.dump()
 
-    if not parsing_is_successful:
-        exit(-1)
+    bytes_written, seconds = backend.bytes_written - bytes_written, backend.seconds - seconds
 
-    errors_linkage = linker.link()
+    for path in written:
+        logger.debug(f'Written: `{path}`')
 
-    if len(errors_linkage) > 0:
+    throughput = bytes_written / seconds if seconds > 0.0 else 0.0
+    logger.info(f'Files written: {len(written)}, skipped as unchanged: {len(skipped)} '
+                f'({bytes_written / 2 ** 20:.2f} MiB in {seconds:.3f}s, {throughput / 2 ** 20:.2f} MiB/s)')
 
-        for e in errors_linkage:
-            logger.error(str(e))
+    return [], written, skipped
 
-        exit(-1)
 
-    symbols = list(linker.registry.values())
-    codegen = cgen.CodeGenerator(symbols, config)
+def epigen(config: EpiGenConfig, manifest: EpiGenManifest, backend: bk.Backend = None) -> EpiGenResult:
 
+    # NOTE: the errors of the inputs are reported in the result rather than by exiting,
+    # so the function could be called repeatedly within the same (long-running) process
+    result = EpiGenResult()
+    time_start = time.perf_counter()
+
+    # NOTE: the build through the in-memory backend doesn't touch the disk: neither the output
+    # directories nor the log file nor the caches of the discovery and the parser are written
+    # (the build database lives in the backend), unless the profile is requested explicitly
+    on_disk = backend is None or isinstance(backend, bk.FileSystemBackend)
+    if on_disk:
+
+        os.makedirs(config.dir_output, exist_ok=True)
+        os.makedirs(config.dir_output_build, exist_ok=True)
+
+    try:
+
+        with _logging(config, on_disk):
+            _epigen_profiled(config, manifest, backend, result, on_disk)
+
+    finally:
+        result.seconds = time.perf_counter() - time_start
+
+    return result
+
+
+def _epigen_profiled(config: EpiGenConfig, manifest: EpiGenManifest, backend: bk.Backend, result: EpiGenResult, on_disk: bool):
+
+    if not config.profile:
+
+        _epigen(config, manifest, backend, result, on_disk)
+        return
+
+    import json
+    import cProfile
+
+    profiler = prof.start()
+    profiler_cprofile = cProfile.Profile() if config.profile_cprofile else None
+
+    # NOTE: the report is dumped even if the build fails, since it's the slow or failed build which is profiled
     try:
-        errors_codegen = codegen.code_generate()
-    except cgen.CodeGenerationErrorFatal:
-        pass
 
-    for e in errors_codegen:
+        if profiler_cprofile is not None:
+            profiler_cprofile.enable()
+
+        _epigen(config, manifest, backend, result, on_disk)
+
+    finally:
+
+        os.makedirs(config.dir_output_build, exist_ok=True)
+
+        if profiler_cprofile is not None:
+
+            profiler_cprofile.disable()
+            profiler_cprofile.dump_stats(os.path.join(config.dir_output_build, 'epigen-profile.prof'))
+
+        prof.stop()
+
+        with open(os.path.join(config.dir_output_build, 'epigen-profile.json'), 'w') as f:
+            json.dump(profiler.report(), f, indent=4)
+
+
+def _epigen(config: EpiGenConfig, manifest: EpiGenManifest, backend: bk.Backend, result: EpiGenResult, on_disk: bool):
+
+    if config.debug:
+        logger.info(f'Debug mode enabled')
+
+    logger.info(f'Input Dir: {config.dir_input}')
+    logger.info(f'Output Dir: {config.dir_output}')
+    logger.info(f'Output CXX HXX Dir: {config.dir_output_build}')
+    logger.info(f'Ignore-list: {";".join(config.ignore_list)}')
+    logger.info(f'Caching is enabled: {config.caching}')
+    logger.info(f'Jobs: {config.jobs}')
+    logger.info(f'Modules: {";".join(manifest.modules)}')
+
+    if config.backup:
+
+        from tempfile import TemporaryDirectory
+        from tempfile import gettempdir
+        from uuid import uuid1
+
+        backupdir = f'{gettempdir()}/EpiCodeGenerator-{uuid1()}-backup'
+        logger.info(f'Backup <input dir> into {backupdir}')
+        shutil.copytree(config.dir_input, backupdir, ignore=_ignore_on_copy)
+
+    # NOTE: the caches of the discovery and the parser are kept on the disk only
+    config_disk = config if on_disk else dataclasses.replace(config, caching=False)
+
+    linker = ln.Linker()
+
+    with _stage('discovery', result.timings):
+        units, result.errors = _units(config, manifest, epigen_inputs(config_disk))
+
+    if units is None:
+        return
+
+    prof.count('inputs', len(units))
+
+    _prune(config_disk, units)
+
+    inputs = {}
+    with _stage('parse', result.timings):
+
+        for (registry_local, errors_syntax, tokens, cached, stats, source), (_, relpath, modulepath) in zip(_parse_units(units, config_disk), units):
+
+            result.errors += _log_parsed(modulepath, errors_syntax, tokens, cached)
+            result.parsed += 1
+            result.cached += int(cached)
+
+            inputs[relpath] = source
+
+            with prof.stage('register'):
+                linker.register(registry_local)
+
+            prof.count('inputs_cached', int(cached))
+            prof.count('symbols', len(registry_local))
+
+            if stats is not None:
+
+                prof.count('tokens', stats['tokens'])
+                prof.file(relpath, cached=cached, symbols=len(registry_local), **stats)
+
+    if len(result.errors) > 0:
+        return
 
-        logger.error(str(e))
-        exit(-1)
+    result.errors = _link(linker, result.timings)
+    if len(result.errors) > 0:
+        return
 
-    codegen.dump()
+    result.errors, result.written, result.skipped = _generate(config, linker, backend, result.timings, inputs)
+    result.success = len(result.errors) == 0
@@ -0,0 +1,48 @@
+import os
+import hashlib
+
+
+_DIRNAME = os.path.dirname(os.path.abspath(__file__))
+
+# NOTE: the sources of the running process don't change until it's restarted,
+# so every fingerprint is computed once per process
+_FINGERPRINTS = {}
+
+
+def _paths_of(relpath: str) -> list:
+
+    path = os.path.join(_DIRNAME, relpath)
+    if os.path.isfile(path):
+        return [path]
+
+    paths = []
+    for root, dirs, files in os.walk(path):
+
+        dirs.sort()
+        paths += [os.path.join(root, f) for f in sorted(files) if f.endswith('.py') or f.endswith('.txt')]
+
+    return paths
+
+
+def sources(relpaths: tuple) -> str:
+
+    # NOTE: the data cached on the disk is invalidated whenever the code which produced it
+    # (the given package files and directories along with their templates) has changed
+    fingerprint = _FINGERPRINTS.get(relpaths)
+    if fingerprint is not None:
+        return fingerprint
+
+    sha = hashlib.sha1()
+    for relpath in relpaths:
+
+        for path in _paths_of(relpath):
+
+            with open(path, 'rb') as f:
+
+                sha.update(os.path.relpath(path, _DIRNAME).replace(os.sep, '/').encode())
+                sha.update(hashlib.sha1(f.read()).digest())
+
+    fingerprint = sha.hexdigest()
+    _FINGERPRINTS[relpaths] = fingerprint
+
+    return fingerprint
@@ -2,6 +2,7 @@ from epigen.tokenizer import Token
 from epigen.tokenizer import Tokenizer
 from epigen.tokenizer import TokenType
 
+from collections import deque
 from enum import Enum, auto, unique
 
 
@@ -92,27 +93,53 @@ class IDLParserErrorFatal(Exception):
     pass
 
 
+class IDLParserErrorUnknownToken(Exception):
+    pass
+
+
 class IDLParser:
 
     def __init__(self, tokens):
 
-        self.tokens = tokens
-        self.__at = 0
+        # NOTE: `tokens` could be any iterable (e.g. `Tokenizer.tokenize_iter()`),
+        # only the lookahead tokens are kept in the buffer
+        self.__tokens = iter(tokens)
+        self.__tokens_lookahead = deque()
+        self.__tokens_unknown = []
         self.syntax_errors = []
 
+    def _pull(self) -> bool:
+
+        token = next(self.__tokens, None)
+        if token is None:
+            return False
+
+        if token.tokentype == TokenType.Unknown:
+
+            self.__tokens_unknown.append(token)
+            raise IDLParserErrorUnknownToken()
+
+        self.__tokens_lookahead.append(token)
+
+        return True
+
     def _eof(self):
-        return self.__at >= len(self.tokens)
+        return len(self.__tokens_lookahead) == 0 and not self._pull()
 
     def _curr(self):
-        return self.tokens[self.__at] if not self._eof() else None
+        return self.__tokens_lookahead[0] if not self._eof() else None
 
     def _next(self, offset: int = 1):
 
         # TODO: throw EOF
 
-        self.__at += offset - 1
+        for _ in range(offset - 1):
+            if not self._eof():
+                self.__tokens_lookahead.popleft()
+
         curr = self._curr()
-        self.__at += 1
+        if curr is not None:
+            self.__tokens_lookahead.popleft()
 
         return curr
 
@@ -141,14 +168,14 @@ class IDLParser:
         if 'expected' in kwargs:
 
             expected = kwargs['expected']
-            assert isinstance(expected, list)
+            assert isinstance(expected, (list, tuple))
 
             success = token is not None and token.tokentype in expected
 
         if success and 'unexpected' in kwargs:
 
             unexpected = kwargs['unexpected']
-            assert isinstance(unexpected, list)
+            assert isinstance(unexpected, (list, tuple))
 
             success = token is not None and token.tokentype not in unexpected
 
@@ -183,10 +210,6 @@ class IDLParser:
         from epigen.idlparser import idlparser_enum as idlenum
         from epigen.idlparser import idlparser_attr as idlattr
 
-        self.syntax_errors = [IDLSyntaxError(t, IDLSyntaxErrorCode.UnknownToken, '') for t in self.tokens if t.tokentype == TokenType.Unknown]
-        if len(self.syntax_errors) > 0:
-            return {}, self.syntax_errors
-
         registry = {}
 
         try:
@@ -222,6 +245,16 @@ class IDLParser:
 
         except IDLParserErrorFatal:
             pass
+        except IDLParserErrorUnknownToken:
+            pass
+
+        # NOTE: unknown tokens are reported instead of any other syntax error,
+        # so the rest of the stream is drained to collect them all
+        self.__tokens_unknown.extend(t for t in self.__tokens if t.tokentype == TokenType.Unknown)
+        if len(self.__tokens_unknown) > 0:
+
+            self.syntax_errors = [IDLSyntaxError(t, IDLSyntaxErrorCode.UnknownToken, '') for t in self.__tokens_unknown]
+            return {}, self.syntax_errors
 
         if len(self.syntax_errors) > 0:
             registry = {}
@@ -0,0 +1,153 @@
+from epigen import fingerprint as fp
+
+import os
+import hmac
+import pickle
+import hashlib
+import tempfile
+
+
+# NOTE: the key is read once per process
+_KEYS = {}
+
+
+def _key_path() -> str:
+
+    dirpath = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(dirpath, 'epigen', 'cache.key')
+
+
+def _secret() -> bytes:
+
+    # NOTE: the entries are signed by the key which is readable by the user only (rather than kept
+    # in the build directory), so the entry written by someone else is never unpickled
+    path = _key_path()
+
+    secret = _KEYS.get(path)
+    if secret is not None:
+        return secret
+
+    if not os.path.exists(path):
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # NOTE: the key is written aside (readable by the user only) and then linked,
+        # so the processes which create it simultaneously end up with the same one
+        fd, tmppath = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+
+            with os.fdopen(fd, 'wb') as f:
+                f.write(os.urandom(32))
+
+            try:
+                os.link(tmppath, path)
+            except FileExistsError:
+                pass
+
+        finally:
+            os.remove(tmppath)
+
+    with open(path, 'rb') as f:
+        secret = f.read()
+
+    _KEYS[path] = secret
+    return secret
+
+
+class IDLParserCache:
+
+    # NOTE: the registries are parsed by these, so the entries are invalidated once any of them has changed
+    SOURCES = ('tokenizer.py', 'symbol.py', 'idlparser')
+
+    # NOTE: every entry starts with the HMAC-SHA256 of its pickled payload
+    SIGNATURE_LEN = 32
+
+    def __init__(self, dirpath: str):
+        self.__dirpath = dirpath
+
+    @staticmethod
+    def digest(abspath: str) -> str:
+
+        # NOTE: the same as `Tokenizer.digest`, so the digest of the cached input could be recorded as its parsed version
+        with open(abspath, 'r') as f:
+            return hashlib.md5(f.read().encode()).hexdigest()
+
+    def _key(self, relpath: str, modulepath: str, digest: str) -> tuple:
+        return (fp.sources(IDLParserCache.SOURCES), relpath, modulepath, digest)
+
+    def _signature_of(self, payload: bytes) -> bytes:
+        return hmac.new(_secret(), payload, hashlib.sha256).digest()
+
+    def _filename_of(self, relpath: str) -> str:
+        return f'{hashlib.md5(relpath.encode()).hexdigest()}.bin'
+
+    def _filepath_of(self, relpath: str) -> str:
+        return os.path.join(self.__dirpath, self._filename_of(relpath))
+
+    def load(self, relpath: str, modulepath: str, digest: str) -> tuple:
+
+        filepath = self._filepath_of(relpath)
+        if not os.path.exists(filepath):
+            return None
+
+        try:
+
+            with open(filepath, 'rb') as f:
+                signature, payload = f.read(IDLParserCache.SIGNATURE_LEN), f.read()
+
+            # NOTE: the entry which isn't signed by the key of the user is never unpickled
+            if not hmac.compare_digest(signature, self._signature_of(payload)):
+                return None
+
+            key, registry, errors = pickle.loads(payload)
+
+        except Exception:
+            # NOTE: a stale or corrupted entry is just a cache miss
+            return None
+
+        if key != self._key(relpath, modulepath, digest):
+            return None
+
+        return registry, errors
+
+    def store(self, relpath: str, modulepath: str, digest: str, registry: dict, errors: list):
+
+        os.makedirs(self.__dirpath, exist_ok=True)
+
+        payload = pickle.dumps((self._key(relpath, modulepath, digest), registry, errors))
+
+        # NOTE: several workers could store entries simultaneously,
+        # so the entry is written aside and then atomically replaced
+        fd, tmppath = tempfile.mkstemp(dir=self.__dirpath, suffix='.tmp')
+        try:
+
+            with os.fdopen(fd, 'wb') as f:
+
+                f.write(self._signature_of(payload))
+                f.write(payload)
+
+            os.replace(tmppath, self._filepath_of(relpath))
+
+        except BaseException:
+
+            os.remove(tmppath)
+            raise
+
+    def prune(self, relpaths: list):
+
+        # NOTE: the entries of the removed or renamed inputs would never be loaded again
+        filenames = {self._filename_of(relpath) for relpath in relpaths}
+
+        try:
+            entries = os.listdir(self.__dirpath)
+        except OSError:
+            return
+
+        for filename in entries:
+
+            if filename.endswith('.bin') and filename not in filenames:
+
+                try:
+                    os.remove(os.path.join(self.__dirpath, filename))
+                except OSError:
+                    pass
@@ -1,14 +1,17 @@
 from epigen.idlparser import idlparser_base as idl
 
 from epigen.tokenizer import TokenType
+from epigen.tokenizer import TokenTypeGroup
 
 from epigen.symbol import EpiProperty
 
 
+_TOKENTYPE_TYPES = TokenTypeGroup([TokenType.Identifier, *TokenType.builtin_types()])
+
+
 def parse_property(parser: idl.IDLParser) -> EpiProperty:
 
-    tokentype_types = [TokenType.Identifier]
-    tokentype_types.extend(TokenType.builtin_types())
+    tokentype_types = _TOKENTYPE_TYPES
 
     parser._test(parser._curr(), expected=tokentype_types, err_code=idl.IDLSyntaxErrorCode.UnexpectedToken)
 
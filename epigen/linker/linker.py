@@ -6,6 +6,8 @@ from epigen.symbol import EpiProperty
 from epigen.symbol import EpiEnum
 from epigen.symbol import EpiEnumEntry
 
+from epigen import profiler as prof
+
 from enum import Enum, auto
 import zlib
 
@@ -59,6 +61,10 @@ class Linker:
     def __init__(self):
 
         self.__registry = {}
+        self.__typeids = {}
+        self.__symbols = None
+        self.__scopes = {}
+        self.__lookups = {}
         self.__linker_errors = []
 
     @property
@@ -70,96 +76,205 @@ class Linker:
 
     def register(self, registry: dict):
 
-        def _typeids(symbols: list) -> set:
-            return [(s, hex(zlib.crc32(s.name.encode()) & 0xffffffff)) for s in symbols]
+        def _typeid(symbol: EpiSymbol) -> int:
+            return zlib.crc32(symbol.name.encode()) & 0xffffffff
+
+        def _validate_duplicates(lhs: EpiSymbol, rhss: list) -> bool:
 
-        def _validate_duplicates(typeid_pairs: list) -> bool:
+            for rhs in rhss:
 
-            valid = True
-            for lhs, rhs in typeid_pairs:
+                if lhs.name == rhs.name:
 
-                if lhs[0].name == rhs[0].name:
+                    tip = f'The symbol has been already defined in `{rhs.token.modulepath}`'
+                    self._push_error(lhs, LinkerErrorCode.DuplicatingSymbol, tip)
 
-                    valid = False
-                    tip = f'The symbol has been already defined in `{rhs[0].token.modulepath}`'
-                    self._push_error(lhs[0], LinkerErrorCode.DuplicatingSymbol, tip)
+                else:
 
-                elif lhs[1] == rhs[1]:
+                    tip = f'Hash collision with `{rhs.name}` defined in `{rhs.token.modulepath}`'
+                    self._push_error(lhs, LinkerErrorCode.HashCollision, tip)
 
-                    valid = False
-                    tip = f'Hash collision with `{rhs[0].name}` defined in `{rhs[0].token.modulepath}`'
-                    self._push_error(lhs[0], LinkerErrorCode.HashCollision, tip)
+            return len(rhss) == 0
 
-            return valid
+        # NOTE: symbols are compared only against the symbols of the same typeid
+        # (the symbols of the same name share the typeid as well), every typeid bucket
+        # keeps the registration order, so the errors are reported in the same order
+        # as if every pair of symbols would be compared
+        typeids_local = [(s, _typeid(s)) for s in registry.values()]
 
-        typeids_local = _typeids(list(registry.values()))
-        typeids_local_typeids_local = [(lhs, rhs) for lhs in typeids_local for rhs in typeids_local]
+        valid_locally = True
+        typeids_local_index = {}
+        for sym, typeid in typeids_local:
 
-        # NOTE: `typeids_local_typeids_local` is cartesian product A * A,
-        # so we need exclude (a0, a0), (a1, a1) and (a0, a1), (a1, a0) pairs
-        ii = 0
-        typeids_local_len = len(typeids_local)
-        for i in range(typeids_local_len):
+            bucket = typeids_local_index.setdefault(typeid, [])
+            valid_locally = _validate_duplicates(sym, bucket) and valid_locally
+            bucket.append(sym)
 
-            del typeids_local_typeids_local[i + ii : typeids_local_len + ii]
-            ii += i
+        valid_globally = True
+        for sym, typeid in typeids_local:
+            valid_globally = _validate_duplicates(sym, self.__typeids.get(typeid, [])) and valid_globally
 
-        valid_locally = _validate_duplicates(typeids_local_typeids_local)
+        if valid_globally and valid_locally:
 
-        typeids_global = _typeids(list(self.__registry.values()))
-        typeids_local_typeids_global = [(lhs, rhs) for lhs in typeids_local for rhs in typeids_global]
+            self.__registry.update(registry)
+            self.__symbols = None
+            self.__scopes = {}
+            self.__lookups = {}
+            for sym, typeid in typeids_local:
+                self.__typeids.setdefault(typeid, []).append(sym)
 
-        if _validate_duplicates(typeids_local_typeids_global) and valid_locally:
-            self.__registry = { **self.__registry, **registry }
+    def _index(self) -> dict:
 
+        # NOTE: maps the qualified names of the symbols to the pairs of the symbol and its ordinal
+        # (only enum entries have it), the first one of the duplicating enum entries wins
+        if self.__symbols is not None:
+            return self.__symbols
 
-    def lookup_symbol(self, ref: str, sym_outer: EpiSymbol = None) -> EpiSymbol:
+        symbols = {}
+
+        def _index_enum(qualname: str, enum: EpiEnum):
+
+            for i, e in enumerate(enum.entries):
+                symbols.setdefault(f'{qualname}::{e.name}', (e, i))
+
+        for name, sym in self.__registry.items():
+
+            symbols[name] = (sym, None)
+
+            if isinstance(sym, EpiClass):
+
+                for inner in sym.inner().values():
+
+                    symbols[f'{name}::{inner.name}'] = (inner, None)
+                    if isinstance(inner, EpiEnum):
+                        _index_enum(f'{name}::{inner.name}', inner)
+
+            elif isinstance(sym, EpiEnum):
+                _index_enum(name, sym)
+
+        self.__symbols = symbols
+
+        return self.__symbols
+
+    def _scope(self, clss: EpiClass) -> dict:
+
+        # NOTE: maps the names of the inner symbols visible in the class (including the inherited ones)
+        # to their qualified names, the nearest definition wins the same way it does while climbing up the hierarchy
+        if clss.name in self.__scopes:
+            return self.__scopes[clss.name]
+
+        clsss = [clss]
+        while clsss[-1].parent is not None and clsss[-1].parent not in self.__scopes:
+
+            assert clsss[-1].parent in self.__registry
+            clsss.append(self.__registry[clsss[-1].parent])
+
+        for c in reversed(clsss):
+
+            scope = dict(self.__scopes[c.parent]) if c.parent is not None else {}
+            scope.update((name, f'{c.name}::{name}') for name in c.inner())
+
+            self.__scopes[c.name] = scope
+
+        return self.__scopes[clss.name]
+
+    def _resolve(self, ref: str, sym_outer: EpiSymbol = None) -> tuple:
+
+        # NOTE: resolves the reference to the pair of the qualified name and the symbol,
+        # symbols aren't hashable, so the lookups are memoized by the identity of the outer symbol
+        memo = self.__lookups.get((ref, id(sym_outer)))
+        if memo is not None and memo[0] is sym_outer:
+            return memo[1]
 
         path = ref.split('::')
         assert len(path) > 1 or (len(path) == 1 and sym_outer is not None)
 
+        symbols = self._index()
+
+        qualname = None
         if isinstance(sym_outer, EpiClass):
-            clss_parent = sym_outer
-            while True:
+            qualname = self._scope(sym_outer).get(path[0])
 
-                if path[0] in clss_parent.inner():
-                    sym_lookup = clss_parent.inner()[path[0]]
-                    break
+        elif isinstance(sym_outer, EpiEnum) and f'{sym_outer.fullname}::{path[0]}' in symbols:
+            qualname = f'{sym_outer.fullname}::{path[0]}'
 
-                if clss_parent.parent is None:
-                    sym_lookup = None
-                    break
+        if qualname is None and path[0] in self.__registry:
+            qualname = path[0]
 
-                assert clss_parent.parent in self.__registry
-                clss_parent = self.__registry[clss_parent.parent]
+        resolved = (None, None)
+        if qualname is not None:
 
-        if isinstance(sym_outer, EpiClass) and sym_lookup is not None:
-            pass
-        elif isinstance(sym_outer, EpiEnum) and next((e for e in sym_outer.entries if e.name == path[0]), None) is not None:
-            sym_lookup = next(e for e in sym_outer.entries if e.name == path[0])
-        elif path[0] in self.__registry:
-            sym_lookup = self.__registry[path[0]]
-        else:
-            sym_lookup = None
+            path[0] = qualname
+            qualname = '::'.join(path)
 
-        if sym_lookup is not None:
+            sym_lookup, _ = symbols.get(qualname, (None, None))
+            if sym_lookup is not None:
+                resolved = (qualname, sym_lookup)
 
-            for i, pathnode in enumerate(path[1:]):
+        self.__lookups[(ref, id(sym_outer))] = (sym_outer, resolved)
 
-                if isinstance(sym_lookup, EpiEnum):
+        return resolved
 
-                    entry = next((e for e in sym_lookup.entries if pathnode == e.name), None)
-                    sym_lookup = entry if i == len(path[1:]) - 1 else None
-                    break
+    def lookup_symbol(self, ref: str, sym_outer: EpiSymbol = None) -> EpiSymbol:
+        return self._resolve(ref, sym_outer)[1]
 
-                elif isinstance(sym_lookup, EpiClass) and pathnode in sym_lookup.inner():
-                    sym_lookup = sym_lookup.inner()[pathnode]
+    def dependencies(self) -> dict:
 
-                else:
-                    sym_lookup = None
-                    break
+        # NOTE: maps the name of every top-level symbol to the names of the top-level symbols
+        # its generated code depends on: the parent class, the property types, the template arguments
+        # and the referenced values (the inner symbols are accounted to their outer symbol)
+        dependencies = {}
 
-        return sym_lookup
+        def _depend(refs: set, ref: str, sym_outer: EpiSymbol):
+
+            qualname, _ = self._resolve(ref, sym_outer)
+            if qualname is not None:
+                refs.add(qualname.split('::')[0])
+
+        for name, sym in self.__registry.items():
+
+            refs = set()
+
+            enums = []
+            if isinstance(sym, EpiClass):
+
+                if sym.parent is not None:
+                    refs.add(sym.parent)
+
+                for p in sym.properties:
+
+                    if p.tokentype.tokentype == TokenType.Identifier:
+                        _depend(refs, p.typename_basename(), sym)
+
+                    if p.value_is_assigned() and p.tokenvalue.tokentype == TokenType.Identifier:
+                        _depend(refs, p.tokenvalue.text, sym)
+
+                    for n in (n for n in p.tokens_nested if n.tokentype == TokenType.Identifier):
+                        _depend(refs, n.text, sym)
+
+                enums = [inner for inner in sym.inner().values() if isinstance(inner, EpiEnum)]
+
+            elif isinstance(sym, EpiEnum):
+                enums = [sym]
+
+            for enum in enums:
+
+                for e in enum.entries:
+
+                    for v in (v for v in e.valuetokens if v.tokentype == TokenType.Identifier):
+                        _depend(refs, v.text, enum)
+
+            refs.discard(name)
+            dependencies[name] = refs
+
+        return dependencies
+
+    def _ordinal(self, enum: EpiEnum, entry: EpiEnumEntry) -> int:
+
+        _, ordinal = self._index().get(f'{enum.fullname}::{entry.name}', (None, None))
+        if ordinal is not None and enum.entries[ordinal] is entry:
+            return ordinal
+
+        return enum.entries.index(entry)
 
     def _validate_class_properties(self, clss: EpiClass):
 
@@ -228,7 +343,7 @@ class Linker:
                     tip = f"Couldn't assign `{v.text}` to the `enum` type"
                     self._push_error(e, LinkerErrorCode.IncorrectValueAssignment, tip)
 
-                elif enum.entries.index(sym_lookup) >= i:
+                elif self._ordinal(enum, sym_lookup) >= i:
                     tip = f'No such symbol exists: `{v.text}`'
                     self._push_error(e, LinkerErrorCode.NoSuchSymbol, tip)
 
@@ -260,32 +375,38 @@ class Linker:
         if len(self.__linker_errors) > 0:
             return self.__linker_errors
 
-        inheritance_tree = lntree.InheritanceTree(self.__registry)
-        inheritance_tree.build(self)
-        inheritance_tree.validate(self)
+        with prof.stage('link.inheritance'):
+
+            inheritance_tree = lntree.InheritanceTree(self.__registry)
+            inheritance_tree.build(self)
+            inheritance_tree.validate(self)
 
         if len(self.__linker_errors) != 0:
             return self.__linker_errors
 
-        for sym in self.__registry.values():
+        with prof.stage('link.validate'):
 
-            if isinstance(sym, EpiClass):
-                self._validate_class_properties(sym)
+            for sym in self.__registry.values():
 
-                for sym_inner in sym.inner().values():
-                    assert isinstance(sym_inner, EpiEnum)
-                    self._validate_enum_entries(sym_inner)
+                if isinstance(sym, EpiClass):
+                    self._validate_class_properties(sym)
 
-            elif isinstance(sym, EpiEnum):
-                self._validate_enum_entries(sym)
+                    for sym_inner in sym.inner().values():
+                        assert isinstance(sym_inner, EpiEnum)
+                        self._validate_enum_entries(sym_inner)
 
-        for sym in self.__registry.values():
+                elif isinstance(sym, EpiEnum):
+                    self._validate_enum_entries(sym)
 
-            if isinstance(sym, EpiClass):
-                for enum in (inner for inner in sym.inner().values() if isinstance(inner, EpiEnum)):
-                    self._resolve_enum_values(enum)
+        with prof.stage('link.resolve'):
 
-            elif isinstance(sym, EpiEnum):
-                self._resolve_enum_values(sym)
+            for sym in self.__registry.values():
+
+                if isinstance(sym, EpiClass):
+                    for enum in (inner for inner in sym.inner().values() if isinstance(inner, EpiEnum)):
+                        self._resolve_enum_values(enum)
+
+                elif isinstance(sym, EpiEnum):
+                    self._resolve_enum_values(sym)
 
         return self.__linker_errors
@@ -2,6 +2,7 @@ from epigen.linker import linker as ln
 
 from epigen.symbol import EpiSymbol
 from epigen.symbol import EpiClass
+from epigen.symbol import EpiProperty
 from epigen.symbol import EpiEnum
 
 import zlib
@@ -18,6 +19,7 @@ class InheritanceTree:
             self.clss = clss
             self.parent = parent
             self.is_leaf = True
+            self.children = []
 
     def __init__(self, registry: dict):
 
@@ -43,6 +45,9 @@ class InheritanceTree:
             node = InheritanceTree.Node(sym, parent)
             self.__clss_nodes[name] = node
 
+            if parent is not None:
+                parent.children.append(node)
+
             return node
 
         for name, clss in ((name, sym) for name, sym in self.__registry.items() if isinstance(sym, EpiClass)):
@@ -83,70 +88,48 @@ class InheritanceTree:
 
     def _validate_classes(self, linker: ln.Linker):
 
-        memo = {}
-
-        def _validate(key: str, node: InheritanceTree.Node):
-
-            assert isinstance(node.clss, EpiClass)
-
-            def _pids(properties: list) -> set:
-                return [(p, hex(zlib.crc32(p.name.encode()) & 0xffffffff)) for p in properties]
-
-            def _validate_properties(node: InheritanceTree.Node, prts: list):
-
-                def _validate_duplicates(pid_pairs: list):
+        def _pid(p: EpiProperty) -> int:
+            return zlib.crc32(p.name.encode()) & 0xffffffff
 
-                    for lhs, rhs in pid_pairs:
+        # NOTE: the tree is traversed depth-first with a single index of the properties
+        # visible in the current class (the inherited ones plus the own ones): the own properties
+        # are pushed into the index on entering a class and popped on leaving it, so every class
+        # is validated only against the properties it declares
+        pids = {}
+        stack = [(node, None) for node in reversed(self.__clss_nodes.values()) if node.parent is None]
 
-                        if lhs[0].name == rhs[0].name:
+        while len(stack) > 0:
 
-                            tip = f'The symbol has been already defined in `{rhs[0].token.modulepath}`'
-                            linker._push_error(lhs[0], ln.LinkerErrorCode.DuplicatingSymbol, tip)
+            node, pids_own = stack.pop()
+            if pids_own is not None:
 
-                        elif lhs[1] == rhs[1]:
+                for pid in reversed(pids_own):
+                    pids[pid].pop()
 
-                            tip = f'Hash collision with `{rhs[0].name}` defined in `{rhs[0].token.modulepath}`'
-                            linker._push_error(lhs[0], ln.LinkerErrorCode.HashCollision, tip)
-
-                pids = _pids(prts)
-                pids_pids = [(lhs, rhs) for lhs in pids for rhs in pids]
-
-                # NOTE: `pids_pids` is cartesian product A * A,
-                # so we need exclude (a0, a0), (a1, a1) and (a0, a1), (a1, a0) pairs
-                ii = 0
-                pids_len = len(pids)
-                for i in range(pids_len):
-
-                    del pids_pids[i + ii : pids_len + ii]
-                    ii += i
-
-                _validate_duplicates(pids_pids)
-
-                if node.parent is None:
+                continue
 
-                    memo[key] = True
-                    return memo[key]
+            assert isinstance(node.clss, EpiClass)
 
-                pids_parent = _pids(node.parent.clss.properties)
-                pids_pids_parent = [(lhs, rhs) for lhs in pids for rhs in pids_parent]
+            pids_own = [_pid(p) for p in node.clss.properties]
+            for p, pid in zip(node.clss.properties, pids_own):
 
-                _validate_duplicates(pids_pids_parent)
+                prts = pids.setdefault(pid, [])
+                for rhs in prts:
 
-                prts = prts[:]
-                prts.extend(node.parent.clss.properties[:])
-                memo[key] = _validate_properties(node.parent, prts)
+                    if p.name == rhs.name:
 
-                return memo[key]
+                        tip = f'The symbol has been already defined in `{rhs.token.modulepath}`'
+                        linker._push_error(p, ln.LinkerErrorCode.DuplicatingSymbol, tip)
 
-            if key in memo:
-                return
+                    else:
 
-            _validate_properties(node, node.clss.properties)
+                        tip = f'Hash collision with `{rhs.name}` defined in `{rhs.token.modulepath}`'
+                        linker._push_error(p, ln.LinkerErrorCode.HashCollision, tip)
 
-        leafs = { k: v for k, v in self.__clss_nodes.items() if v.is_leaf }
+                prts.append(p)
 
-        for k, v in leafs.items():
-            _validate(k, v)
+            stack.append((node, pids_own))
+            stack.extend((child, None) for child in reversed(node.children))
 
         for node in self.__clss_nodes.values():
 
@@ -0,0 +1,107 @@
+import time
+import contextlib
+import contextvars
+
+
+class Profiler:
+
+    def __init__(self):
+
+        self.__stages = {}
+        self.__stack = []
+        self.__counters = {}
+        self.__files = {}
+
+        self.__wall = time.perf_counter()
+        self.__cpu = time.process_time()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+
+        # NOTE: the stages could be nested, so besides the total time every stage keeps
+        # its self time, which excludes the time spent in the nested stages
+        frame = [time.perf_counter(), time.process_time(), 0.0, 0.0]
+        self.__stack.append(frame)
+        try:
+            yield
+
+        finally:
+
+            self.__stack.pop()
+
+            wall = time.perf_counter() - frame[0]
+            cpu = time.process_time() - frame[1]
+
+            if len(self.__stack) > 0:
+
+                self.__stack[-1][2] += wall
+                self.__stack[-1][3] += cpu
+
+            stats = self.__stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'wall_self': 0.0, 'cpu': 0.0, 'cpu_self': 0.0})
+            stats['calls'] += 1
+            stats['wall'] += wall
+            stats['wall_self'] += wall - frame[2]
+            stats['cpu'] += cpu
+            stats['cpu_self'] += cpu - frame[3]
+
+    def count(self, name: str, n: int = 1):
+        self.__counters[name] = self.__counters.get(name, 0) + n
+
+    def file(self, path: str, **stats):
+        self.__files.setdefault(path, {}).update(stats)
+
+    def report(self) -> dict:
+
+        return {
+            'wall': time.perf_counter() - self.__wall,
+            'cpu': time.process_time() - self.__cpu,
+            'stages': self.__stages,
+            'counters': self.__counters,
+            'files': self.__files
+        }
+
+
+# NOTE: the profiler is disabled unless it's started, so the instrumented code costs nothing by default,
+# it's kept per context (so per thread), so the builds run concurrently don't mix their stages
+_profiler = contextvars.ContextVar('epigen_profiler', default=None)
+_stage_disabled = contextlib.nullcontext()
+
+
+def start() -> Profiler:
+
+    profiler = Profiler()
+    _profiler.set(profiler)
+
+    return profiler
+
+
+def stop() -> Profiler:
+
+    profiler = _profiler.get()
+    _profiler.set(None)
+
+    return profiler
+
+
+def enabled() -> bool:
+    return _profiler.get() is not None
+
+
+def stage(name: str):
+
+    profiler = _profiler.get()
+    return profiler.stage(name) if profiler is not None else _stage_disabled
+
+
+def count(name: str, n: int = 1):
+
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.count(name, n)
+
+
+def file(path: str, **stats):
+
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.file(path, **stats)
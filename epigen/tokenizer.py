@@ -1,5 +1,10 @@
 import os
+import re
+import sys
+import mmap
+import hashlib
 from enum import Enum, auto, unique
+from types import MappingProxyType
 
 
 @unique
@@ -138,131 +143,195 @@ class TokenType(Enum):
 
     @staticmethod
     def repr_of(tokentype) -> str:
-
-        for k, v in Tokenizer.keywords().items():
-
-            if v == tokentype:
-                return k
-
-        return None
+        return _KEYWORDS_REPRS.get(tokentype)
 
     @staticmethod
     def is_integer(tokentype) -> bool:
-        return tokentype in TokenType.integers()
+        return tokentype in _TOKENTYPE_INTEGERS
 
     @staticmethod
-    def builtin_types() -> list:
-        return list(Tokenizer.builtin_types().values())
+    def builtin_types() -> tuple:
+        return _TOKENTYPE_BUILTIN_TYPES
 
     @staticmethod
-    def fundamentals() -> list:
-        return list(Tokenizer.fundamentals().values())
+    def fundamentals() -> tuple:
+        return _TOKENTYPE_FUNDAMENTALS
 
     @staticmethod
-    def compounds() -> list:
-        return list(Tokenizer.compounds().values())
+    def compounds() -> tuple:
+        return _TOKENTYPE_COMPOUNDS
 
     @staticmethod
-    def attributes() -> list:
-        return list(Tokenizer.BUILTIN_ATTRIBUTES.values())
+    def attributes() -> tuple:
+        return _TOKENTYPE_ATTRIBUTES
 
     @staticmethod
-    def integers() -> list:
-        return [
-            TokenType.Int8Type,
-            TokenType.Int16Type,
-            TokenType.Int32Type,
-            TokenType.Int64Type,
-            TokenType.UInt8Type,
-            TokenType.UInt16Type,
-            TokenType.UInt32Type,
-            TokenType.UInt64Type,
-            TokenType.ByteType,
-            TokenType.SizeTType,
-            TokenType.HashTType
-        ]
+    def integers() -> tuple:
+        return _TOKENTYPE_INTEGERS
 
     @staticmethod
-    def literals() -> list:
-        return [
-            TokenType.CharLiteral,
-            TokenType.WCharLiteral,
-            TokenType.StringLiteral,
-            TokenType.WStringLiteral,
-            TokenType.IntegerLiteral,
-            TokenType.SingleFloatingLiteral,
-            TokenType.DoubleFloatingLiteral,
-            TokenType.TrueLiteral,
-            TokenType.FalseLiteral,
-            TokenType.Identifier # TODO: split Identifiers into two groups `IdentifierRef` and `IdentifierDec`
-        ]
+    def literals() -> tuple:
+        return _TOKENTYPE_LITERALS
 
     @staticmethod
-    def assignable() -> list:
-        return [
-            TokenType.BoolType,
-            TokenType.ByteType,
-            TokenType.Int8Type,
-            TokenType.Int16Type,
-            TokenType.Int32Type,
-            TokenType.Int64Type,
-            TokenType.UInt8Type,
-            TokenType.UInt16Type,
-            TokenType.UInt32Type,
-            TokenType.UInt64Type,
-            TokenType.SizeTType,
-            TokenType.HashTType,
-            TokenType.SingleFloatingType,
-            TokenType.DoubleFloatingType,
-            TokenType.CharType,
-            TokenType.WCharType,
-            TokenType.StringType,
-            TokenType.WStringType,
-            TokenType.Identifier
-        ]
+    def assignable() -> tuple:
+        return _TOKENTYPE_ASSIGNABLE
 
     @staticmethod
-    def literals_of(tokentype) -> list:
-
-        literals = {
-            TokenType.BoolType: [TokenType.FalseLiteral, TokenType.TrueLiteral],
-            TokenType.ByteType: [TokenType.IntegerLiteral],
-            TokenType.Int8Type: [TokenType.IntegerLiteral],
-            TokenType.Int16Type: [TokenType.IntegerLiteral],
-            TokenType.Int32Type: [TokenType.IntegerLiteral],
-            TokenType.Int64Type: [TokenType.IntegerLiteral],
-            TokenType.UInt8Type: [TokenType.IntegerLiteral],
-            TokenType.UInt16Type: [TokenType.IntegerLiteral],
-            TokenType.UInt32Type: [TokenType.IntegerLiteral],
-            TokenType.UInt64Type: [TokenType.IntegerLiteral],
-            TokenType.SizeTType: [TokenType.IntegerLiteral],
-            TokenType.HashTType: [TokenType.IntegerLiteral],
-            TokenType.SingleFloatingType: [TokenType.SingleFloatingLiteral],
-            TokenType.DoubleFloatingType: [TokenType.DoubleFloatingLiteral],
-            TokenType.CharType: [TokenType.CharLiteral],
-            TokenType.WCharType: [TokenType.WCharLiteral],
-            TokenType.StringType: [TokenType.StringLiteral],
-            TokenType.WStringType: [TokenType.WStringLiteral],
-            TokenType.Identifier: [TokenType.Identifier] # TODO: replace `IdentifierDec -> IdentifierRef`
-        }
-
-        assert len(literals) == len(TokenType.assignable())
-        assert tokentype in literals
-
-        return literals[tokentype]
+    def literals_of(tokentype) -> tuple:
+
+        assert tokentype in _TOKENTYPE_LITERALS_OF
+
+        return _TOKENTYPE_LITERALS_OF[tokentype]
+
+
+class TokenTypeGroup(tuple):
+
+    # NOTE: the order of token types is preserved since it's used while reporting
+    # the expected tokens, but the membership test is backed by a set
+    def __new__(cls, tokentypes):
+
+        group = super().__new__(cls, tokentypes)
+        group.__members = frozenset(group)
+
+        return group
+
+    def __contains__(self, tokentype) -> bool:
+        return tokentype in self.__members
+
+
+_TOKENTYPE_INTEGERS = TokenTypeGroup([
+    TokenType.Int8Type,
+    TokenType.Int16Type,
+    TokenType.Int32Type,
+    TokenType.Int64Type,
+    TokenType.UInt8Type,
+    TokenType.UInt16Type,
+    TokenType.UInt32Type,
+    TokenType.UInt64Type,
+    TokenType.ByteType,
+    TokenType.SizeTType,
+    TokenType.HashTType
+])
+
+_TOKENTYPE_LITERALS = TokenTypeGroup([
+    TokenType.CharLiteral,
+    TokenType.WCharLiteral,
+    TokenType.StringLiteral,
+    TokenType.WStringLiteral,
+    TokenType.IntegerLiteral,
+    TokenType.SingleFloatingLiteral,
+    TokenType.DoubleFloatingLiteral,
+    TokenType.TrueLiteral,
+    TokenType.FalseLiteral,
+    TokenType.Identifier # TODO: split Identifiers into two groups `IdentifierRef` and `IdentifierDec`
+])
+
+_TOKENTYPE_ASSIGNABLE = TokenTypeGroup([
+    TokenType.BoolType,
+    TokenType.ByteType,
+    TokenType.Int8Type,
+    TokenType.Int16Type,
+    TokenType.Int32Type,
+    TokenType.Int64Type,
+    TokenType.UInt8Type,
+    TokenType.UInt16Type,
+    TokenType.UInt32Type,
+    TokenType.UInt64Type,
+    TokenType.SizeTType,
+    TokenType.HashTType,
+    TokenType.SingleFloatingType,
+    TokenType.DoubleFloatingType,
+    TokenType.CharType,
+    TokenType.WCharType,
+    TokenType.StringType,
+    TokenType.WStringType,
+    TokenType.Identifier
+])
+
+_TOKENTYPE_LITERALS_OF = {
+    TokenType.BoolType: TokenTypeGroup([TokenType.FalseLiteral, TokenType.TrueLiteral]),
+    TokenType.ByteType: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.Int8Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.Int16Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.Int32Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.Int64Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.UInt8Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.UInt16Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.UInt32Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.UInt64Type: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.SizeTType: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.HashTType: TokenTypeGroup([TokenType.IntegerLiteral]),
+    TokenType.SingleFloatingType: TokenTypeGroup([TokenType.SingleFloatingLiteral]),
+    TokenType.DoubleFloatingType: TokenTypeGroup([TokenType.DoubleFloatingLiteral]),
+    TokenType.CharType: TokenTypeGroup([TokenType.CharLiteral]),
+    TokenType.WCharType: TokenTypeGroup([TokenType.WCharLiteral]),
+    TokenType.StringType: TokenTypeGroup([TokenType.StringLiteral]),
+    TokenType.WStringType: TokenTypeGroup([TokenType.WStringLiteral]),
+    TokenType.Identifier: TokenTypeGroup([TokenType.Identifier]) # TODO: replace `IdentifierDec -> IdentifierRef`
+}
+
+assert len(_TOKENTYPE_LITERALS_OF) == len(_TOKENTYPE_ASSIGNABLE)
+
+
+class TokenSource:
+
+    # NOTE: shared by all the tokens of a single file
+    __slots__ = ('relpath', 'modulepath')
+
+    def __init__(self, relpath: str, modulepath: str):
+
+        self.relpath = relpath
+        self.modulepath = modulepath
 
 
 class Token:
 
+    __slots__ = ('tokentype', 'text', 'line', 'column', 'source', '__tokentype_expected')
+
     def __init__(self, tokentype, text='???'):
 
         self.tokentype = tokentype
-        self.tokentype_expected = []
         self.text = text
         self.line = None
         self.column = None
-        self.relpath = None
-        self.modulepath = None
+        self.source = None
+        self.__tokentype_expected = None
+
+    @property
+    def tokentype_expected(self) -> list:
+
+        # NOTE: the most of tokens never get it, so it's allocated on demand
+        if self.__tokentype_expected is None:
+            self.__tokentype_expected = []
+
+        return self.__tokentype_expected
+
+    @property
+    def relpath(self) -> str:
+        return self.source.relpath if self.source is not None else None
+
+    @relpath.setter
+    def relpath(self, relpath: str):
+
+        # NOTE: the source is shared by all the tokens of the file, so it's updated in place
+        # (for all of them at once) rather than reallocated per token
+        if self.source is None:
+            self.source = TokenSource(relpath, None)
+        else:
+            self.source.relpath = relpath
+
+    @property
+    def modulepath(self) -> str:
+        return self.source.modulepath if self.source is not None else None
+
+    @modulepath.setter
+    def modulepath(self, modulepath: str):
+
+        if self.source is None:
+            self.source = TokenSource(None, modulepath)
+        else:
+            self.source.modulepath = modulepath
 
     def __eq__(self, rhs):
 
@@ -279,7 +348,7 @@ class Token:
 
     def value(self):
 
-        assert self.tokentype in TokenType.literals()
+        assert self.tokentype in _TOKENTYPE_LITERALS
 
         if self.tokentype in [TokenType.CharLiteral, TokenType.WCharLiteral]:
             return chr(self.text)
@@ -300,16 +369,16 @@ class Token:
             assert False, 'Unhandled case!'
 
     def is_keyword(self) -> bool:
-        return self.text in Tokenizer.keywords()
+        return self.text in _KEYWORDS
 
     def is_builtin_type(self) -> bool:
-        return self.text in Tokenizer.builtin_types()
+        return self.text in _BUILTIN_TYPES
 
     def is_fundamental(self) -> bool:
-        return self.text in Tokenizer.fundamentals()
+        return self.text in _BUILTIN_FUNDAMENTAL_TYPES
 
     def is_compound(self) -> bool:
-        return self.text in Tokenizer.compounds()
+        return self.text in _BUILTIN_COMPOUND_TYPES
 
     def is_type(self) -> bool:
         return self.tokentype == TokenType.Identifier or self.is_builtin_type()
@@ -477,19 +546,104 @@ class Tokenizer:
         # TBD: 'Category': TokenType.Category,
     }
 
-    def __init__(self, abspath: str, relpath: str, modulepath: str):
+    # NOTE: the dispatch table of the scanner keyed by the first character of a token
+    _SCAN_SKIP = 0
+    _SCAN_SPECIAL_SYMBOL = 1
+    _SCAN_CHAR_LITERAL = 2
+    _SCAN_STRING_LITERAL = 3
+    _SCAN_NUMERIC_LITERAL = 4
+    _SCAN_TERM = 5
+    _SCAN_UNKNOWN = 6
+    _SCAN_L = 7
+    _SCAN_SIGN = 8
+
+    # NOTE: skip, term, string literal body, numeric literal
+    _SCAN_RES = (
+        re.compile(r'(?:\s+|#[^\n\0]*)+'),
+        re.compile(r'\w+(?:::\w+)*'),
+        re.compile(r'(?:[^"\\\0]|\\[\s\S]?)*'),
+        re.compile(r'[^\s\0;),]*')
+    )
+
+    # NOTE: the same as `_SCAN_RES`, but for the ASCII buffers (`\s` is spelled out
+    # since it doesn't match `\x1c`-`\x1f` in the bytes patterns unlike `str.isspace`)
+    _SCAN_RES_BYTES = (
+        re.compile(rb'(?:[ \t\n\r\x0b\x0c\x1c-\x1f]+|#[^\n\0]*)+'),
+        re.compile(rb'\w+(?:::\w+)*'),
+        re.compile(rb'(?:[^"\\\0]|\\[\s\S]?)*'),
+        re.compile(rb'[^ \t\n\r\x0b\x0c\x1c-\x1f\0;),]*')
+    )
+
+    # NOTE: the buffer could be scanned in place only if it's the same as the text
+    # the file would be read as (no newline translation, no multibyte characters)
+    _SCAN_RE_BYTES_UNMAPPABLE = re.compile(rb'[^\x00-\x7f]|\r')
+
+    def __init__(self, abspath: str, relpath: str, modulepath: str, legacy: bool = False):
+
+        self.__content = None
+        self.__buffer = None
+
+        # NOTE: the file which is truncated by someone else while it's mapped raises SIGBUS once
+        # the missing pages are scanned (which kills the whole process, e.g. the watch daemon),
+        # so the mapping lives as long as the file is scanned only (see `close`)
+        with open(abspath, 'rb') as f:
+
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # NOTE: neither an empty file nor the one on the filesystem which doesn't support
+                # the mapping (e.g. a special file, ENODEV or EACCES) can be mapped, so it's read instead
+                buffer = None
+
+        if buffer is not None and Tokenizer._SCAN_RE_BYTES_UNMAPPABLE.search(buffer) is None:
+
+            self.__buffer = buffer
+            self.content_len = len(buffer)
+
+        else:
+
+            if buffer is not None:
+                buffer.close()
+
+            with open(abspath, 'r') as f:
+                self.__content = f.read()
 
-        with open(abspath, 'r') as f:
-            self.content = f.read()
+            self.content_len = len(self.__content)
 
-        self.content_len = len(self.content)
+        # NOTE: the digest is of the text which is scanned (the same as the build database keeps
+        # for the inputs), so the outputs are recorded as generated from exactly this version of the file
+        self.digest = hashlib.md5(self.__buffer if self.__buffer is not None else self.__content.encode()).hexdigest()
+
+        self.legacy = legacy
         self.__at = 0
         self.__line = 1
         self.__column = 1
-        self.__relpath = relpath
-        self.__modulepath = modulepath
+        self.__source = TokenSource(relpath, modulepath)
         self.tokens = []
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+
+        # NOTE: the mapping keeps the file open (and locked on Windows) until it's closed,
+        # so it's closed as soon as the file is scanned instead of being left to the GC
+        if self.__buffer is not None:
+
+            self.__buffer.close()
+            self.__buffer = None
+
+    @property
+    def content(self) -> str:
+
+        if self.__content is None:
+            self.__content = self.__buffer[:].decode('ascii')
+
+        return self.__content
+
     def _ch(self, offset: int = 0) -> chr:
         return self.content[self.at + offset] if self.at + offset < self.content_len else '\0'
 
@@ -502,8 +656,7 @@ class Tokenizer:
 
         token.line = self.__line
         token.column = self.__column
-        token.relpath = self.__relpath
-        token.modulepath = self.__modulepath
+        token.source = self.__source
 
         return token
 
@@ -522,8 +675,220 @@ class Tokenizer:
         self.__column += at - self.__at
         self.__at = at
 
+    @staticmethod
+    def _scan_kind(ch: chr) -> int:
+
+        kind = _SCAN_KINDS.get(ch)
+        if kind is not None:
+            return kind
+
+        if ch.isspace():
+            kind = Tokenizer._SCAN_SKIP
+        elif ch.isnumeric():
+            kind = Tokenizer._SCAN_NUMERIC_LITERAL
+        elif ch.isalpha():
+            kind = Tokenizer._SCAN_TERM
+        else:
+            kind = Tokenizer._SCAN_UNKNOWN
+
+        _SCAN_KINDS[ch] = kind
+
+        return kind
+
     def tokenize(self):
 
+        if self.legacy:
+
+            try:
+                return self._tokenize_legacy()
+            finally:
+                self.close()
+
+        self.tokens.extend(self.tokenize_iter())
+
+        return self.tokens
+
+    def tokenize_iter(self):
+
+        # NOTE: yields tokens one by one as they are scanned, so the caller
+        # isn't forced to keep the whole token list of the file in memory
+        try:
+
+            if self.legacy:
+                yield from self._tokenize_legacy()
+            else:
+                yield from self._tokenize_iter()
+
+        finally:
+            self.close()
+
+    def _tokenize_iter(self):
+
+        # NOTE: the memory-mapped buffer is scanned as is, the text is decoded
+        # only for the tokens which carry it (special symbols and keywords share
+        # the constant strings)
+        mapped = self.__buffer is not None
+        if mapped:
+
+            content = self.__buffer
+            re_skip, re_term, re_string_literal_body, re_numeric_literal = Tokenizer._SCAN_RES_BYTES
+            newline, quote, dquote, backslash = b'\n', b'\'', b'"', b'\\'
+
+        else:
+
+            content = self.content
+            re_skip, re_term, re_string_literal_body, re_numeric_literal = Tokenizer._SCAN_RES
+            newline, quote, dquote, backslash = '\n', '\'', '"', '\\'
+
+        content_len = self.content_len
+        token_last = None
+
+        at = 0
+        line = 1
+        line_scanned_until = 0
+        newline_last = -1
+
+        while at < content_len:
+
+            ch = content[at]
+            kind = kind_first = Tokenizer._scan_kind(ch)
+
+            if kind == Tokenizer._SCAN_SKIP:
+
+                at = re_skip.match(content, at).end()
+                continue
+
+            kind_next = Tokenizer._scan_kind(content[at + 1]) if at + 1 < content_len else Tokenizer._SCAN_UNKNOWN
+            if kind == Tokenizer._SCAN_L:
+
+                if kind_next == Tokenizer._SCAN_CHAR_LITERAL:
+                    kind = Tokenizer._SCAN_CHAR_LITERAL
+                elif kind_next == Tokenizer._SCAN_STRING_LITERAL:
+                    kind = Tokenizer._SCAN_STRING_LITERAL
+                else:
+                    kind = Tokenizer._SCAN_TERM
+
+            elif kind == Tokenizer._SCAN_SIGN:
+                kind = Tokenizer._SCAN_NUMERIC_LITERAL if kind_next == Tokenizer._SCAN_NUMERIC_LITERAL else Tokenizer._SCAN_UNKNOWN
+
+            # NOTE: line and column are evaluated the same way the `at` setter does it
+            newline_at = content.rfind(newline, line_scanned_until, at)
+            if newline_at != -1:
+
+                line += content[line_scanned_until:newline_at + 1].count(newline)
+                newline_last = newline_at
+
+            line_scanned_until = at
+            column = at + 1 if newline_last == -1 else at - newline_last + 1
+
+            begin = at
+            text = None
+            tokentype_expected = None
+
+            if kind == Tokenizer._SCAN_SPECIAL_SYMBOL:
+
+                tokentype, text = _SCAN_SPECIAL_SYMBOLS[ch]
+                at += 1
+
+                if tokentype == TokenType.Semicolon and token_last is not None and token_last.tokentype == TokenType.Semicolon:
+                    continue
+
+            elif kind == Tokenizer._SCAN_TERM:
+
+                at = re_term.match(content, at).end()
+                text = content[begin:at]
+                text = sys.intern(text.decode('ascii') if mapped else text)
+                tokentype = _KEYWORDS.get(text, TokenType.Identifier)
+
+            elif kind == Tokenizer._SCAN_NUMERIC_LITERAL:
+
+                at = re_numeric_literal.match(content, at).end()
+                text = content[begin:at]
+                text = text.decode('ascii') if mapped else text
+                tokentype, tokentype_expected = Tokenizer._scan_numeric_literal(text)
+
+            elif kind == Tokenizer._SCAN_STRING_LITERAL:
+
+                tokentype = TokenType.WStringLiteral if kind_first == Tokenizer._SCAN_L else TokenType.StringLiteral
+                at += 2 if kind_first == Tokenizer._SCAN_L else 1
+                at = re_string_literal_body.match(content, at).end()
+
+                if at < content_len and content[at:at + 1] == dquote and content.find(newline, begin, at) == -1:
+                    at += 1
+                else:
+                    tokentype_expected = tokentype
+                    tokentype = TokenType.Unknown
+
+            elif kind == Tokenizer._SCAN_CHAR_LITERAL:
+
+                tokentype = TokenType.WCharLiteral if kind_first == Tokenizer._SCAN_L else TokenType.CharLiteral
+                at += 2 if kind_first == Tokenizer._SCAN_L else 1
+
+                if at < content_len and content[at:at + 1] == backslash:
+                    at += 1
+
+                ch_literal = content[at:at + 1]
+                at += 1
+
+                if at < content_len and content[at:at + 1] == quote and ch_literal != newline:
+                    at += 1
+                else:
+                    tokentype_expected = tokentype
+                    tokentype = TokenType.Unknown
+
+            else:
+
+                tokentype = TokenType.Unknown
+                at += 1
+
+            if text is None:
+
+                text = content[begin:min(at, content_len)]
+                text = text.decode('ascii') if mapped else text
+
+            token = Token(tokentype, text)
+            token.line = line
+            token.column = column
+            token.source = self.__source
+
+            if tokentype_expected is not None:
+                token.tokentype_expected.append(tokentype_expected)
+
+            token_last = token
+            yield token
+
+    @staticmethod
+    def _scan_numeric_literal(text: str) -> tuple:
+
+        digits = text[1:] if text[0] == '-' or text[0] == '+' else text
+        if digits.isnumeric():
+            return TokenType.IntegerLiteral, None
+
+        tokentype_suspected = TokenType.IntegerLiteral
+        tokentype_expected = TokenType.IntegerLiteral
+
+        for i, ch in enumerate(digits):
+
+            if ch == '.' and i + 1 < len(digits) and digits[i + 1].isnumeric() and tokentype_suspected == TokenType.IntegerLiteral:
+
+                tokentype_expected = TokenType.DoubleFloatingLiteral
+                tokentype_suspected = TokenType.DoubleFloatingLiteral
+
+            elif ch == 'f' and tokentype_suspected == TokenType.DoubleFloatingLiteral:
+
+                tokentype_expected = TokenType.SingleFloatingLiteral
+                tokentype_suspected = TokenType.SingleFloatingLiteral
+
+            elif not ch.isnumeric() or tokentype_suspected == TokenType.SingleFloatingLiteral:
+                tokentype_suspected = TokenType.Unknown
+
+        if tokentype_suspected != TokenType.Unknown:
+            tokentype_expected = None
+
+        return tokentype_suspected, tokentype_expected
+
+    def _tokenize_legacy(self):
+
         while self.at < self.content_len:
 
             ch = self._ch()
@@ -555,9 +920,8 @@ class Tokenizer:
 
         for token in self.tokens:
 
-            keywords = Tokenizer.keywords()
-            if token.text in keywords:
-                token.tokentype = keywords[token.text]
+            if token.text in _KEYWORDS:
+                token.tokentype = _KEYWORDS[token.text]
 
         return self.tokens
 
@@ -672,7 +1036,7 @@ class Tokenizer:
 
             self.at += 1
 
-        token.text = self._substring_until_from(begin)
+        token.text = sys.intern(self._substring_until_from(begin))
         self.tokens.append(token)
 
     def _tokenize_numeric_literal(self):
@@ -712,35 +1076,88 @@ class Tokenizer:
 
     @staticmethod
     def keywords() -> dict:
-         return {
-            **Tokenizer.BUILTIN_FUNDAMENTAL_TYPES,
-            **Tokenizer.BUILTIN_COMPOUND_TYPES,
-            **Tokenizer.BUILTIN_TEMPLATED_TYPES,
-            **Tokenizer.BUILTIN_USER_TYPES,
-            **Tokenizer.BUILTIN_ATTRIBUTES,
-            **Tokenizer.BUILTIN_MODIFIERS,
-            **Tokenizer.BUILTIN_VALUES
-        }
+        return _KEYWORDS
 
     @staticmethod
     def builtin_types() -> dict:
-        return {
-            **Tokenizer.BUILTIN_FUNDAMENTAL_TYPES,
-            **Tokenizer.BUILTIN_COMPOUND_TYPES,
-            **Tokenizer.BUILTIN_TEMPLATED_TYPES
-        }
+        return _BUILTIN_TYPES
 
     @staticmethod
     def fundamentals() -> dict:
-        return {
-            **Tokenizer.BUILTIN_FUNDAMENTAL_TYPES
-        }
+        return _BUILTIN_FUNDAMENTAL_TYPES
 
     @staticmethod
     def compounds() -> dict:
-        return {
-            **Tokenizer.BUILTIN_COMPOUND_TYPES
-        }
+        return _BUILTIN_COMPOUND_TYPES
+
+
+# NOTE: the classification tables are computed once and shouldn't be modified
+_KEYWORDS = MappingProxyType({
+    **Tokenizer.BUILTIN_FUNDAMENTAL_TYPES,
+    **Tokenizer.BUILTIN_COMPOUND_TYPES,
+    **Tokenizer.BUILTIN_TEMPLATED_TYPES,
+    **Tokenizer.BUILTIN_USER_TYPES,
+    **Tokenizer.BUILTIN_ATTRIBUTES,
+    **Tokenizer.BUILTIN_MODIFIERS,
+    **Tokenizer.BUILTIN_VALUES
+})
+
+_KEYWORDS_REPRS = MappingProxyType({v: k for k, v in _KEYWORDS.items()})
 
+_BUILTIN_TYPES = MappingProxyType({
+    **Tokenizer.BUILTIN_FUNDAMENTAL_TYPES,
+    **Tokenizer.BUILTIN_COMPOUND_TYPES,
+    **Tokenizer.BUILTIN_TEMPLATED_TYPES
+})
+
+_BUILTIN_FUNDAMENTAL_TYPES = MappingProxyType(dict(Tokenizer.BUILTIN_FUNDAMENTAL_TYPES))
+_BUILTIN_COMPOUND_TYPES = MappingProxyType(dict(Tokenizer.BUILTIN_COMPOUND_TYPES))
+
+_TOKENTYPE_BUILTIN_TYPES = TokenTypeGroup(_BUILTIN_TYPES.values())
+_TOKENTYPE_FUNDAMENTALS = TokenTypeGroup(_BUILTIN_FUNDAMENTAL_TYPES.values())
+_TOKENTYPE_COMPOUNDS = TokenTypeGroup(_BUILTIN_COMPOUND_TYPES.values())
+_TOKENTYPE_ATTRIBUTES = TokenTypeGroup(Tokenizer.BUILTIN_ATTRIBUTES.values())
 
 assert len(Tokenizer.keywords().values()) == len(set(Tokenizer.keywords().values())), 'Every builtin keyword should much a single TokenType'
+
+
+def _scan_kinds() -> dict:
+
+    kinds = {}
+    for ch in map(chr, range(128)):
+
+        if ch.isspace() or ch == '#':
+            kinds[ch] = Tokenizer._SCAN_SKIP
+        elif ch == '\'':
+            kinds[ch] = Tokenizer._SCAN_CHAR_LITERAL
+        elif ch == '"':
+            kinds[ch] = Tokenizer._SCAN_STRING_LITERAL
+        elif ch == 'L':
+            kinds[ch] = Tokenizer._SCAN_L
+        elif ch in Tokenizer.SPECIAL_SYMBOL_TOKEN_TYPES:
+            kinds[ch] = Tokenizer._SCAN_SPECIAL_SYMBOL
+        elif ch.isnumeric():
+            kinds[ch] = Tokenizer._SCAN_NUMERIC_LITERAL
+        elif ch == '-' or ch == '+':
+            kinds[ch] = Tokenizer._SCAN_SIGN
+        elif ch.isalpha():
+            kinds[ch] = Tokenizer._SCAN_TERM
+        else:
+            kinds[ch] = Tokenizer._SCAN_UNKNOWN
+
+        # NOTE: the memory-mapped buffer is indexed by bytes
+        kinds[ord(ch)] = kinds[ch]
+
+    return kinds
+
+
+# NOTE: non-ASCII characters are classified on demand by `Tokenizer._scan_kind`
+_SCAN_KINDS = _scan_kinds()
+
+# NOTE: the scanner relies on every special symbol being a single character
+assert all(len(text) == 1 for text in Tokenizer.SPECIAL_SYMBOL_TOKEN_TYPES)
+
+_SCAN_SPECIAL_SYMBOLS = {
+    **{text: (tokentype, text) for text, tokentype in Tokenizer.SPECIAL_SYMBOL_TOKEN_TYPES.items()},
+    **{ord(text): (tokentype, text) for text, tokentype in Tokenizer.SPECIAL_SYMBOL_TOKEN_TYPES.items()}
+}
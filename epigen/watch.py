@@ -0,0 +1,208 @@
+from epigen import epigen as eg
+
+from epigen.linker import linker as ln
+from epigen.code_generator import code_generator_backend as bk
+
+from epigen.config import EpiGenConfig
+from epigen.config import EpiGenManifest
+
+import os
+import stat
+import json
+import time
+import logging
+import threading
+from multiprocessing.connection import Listener, Client
+
+
+logger = logging.getLogger('epigen')
+
+
+class Workspace:
+
+    def __init__(self, config: EpiGenConfig, manifest: EpiGenManifest):
+
+        self.__config = config
+        self.__manifest = manifest
+
+        # NOTE: the parsed registries are kept in memory along with the unit and the stat
+        # of the input file they were parsed from, so only the modified input files are parsed again
+        self.__parsed = {}
+        self.__snapshot = {}
+
+        # NOTE: the backend keeps the build database loaded between the builds
+        self.__backend = bk.FileSystemBackend(config.fsync)
+
+    def snapshot(self) -> dict:
+
+        snapshot = {}
+        for abspath in eg.epigen_inputs(self.__config):
+
+            try:
+                st = os.stat(abspath)
+            except FileNotFoundError:
+                continue
+
+            snapshot[abspath] = (st.st_size, st.st_mtime_ns)
+
+        return snapshot
+
+    def modified(self) -> bool:
+        return self.snapshot() != self.__snapshot
+
+    def build(self) -> dict:
+
+        result = {'success': False, 'parsed': 0, 'written': 0, 'skipped': 0, 'errors': []}
+
+        snapshot = self.snapshot()
+
+        units, result['errors'] = eg._units(self.__config, self.__manifest, list(snapshot.keys()))
+        if units is None:
+            return result
+
+        eg._prune(self.__config, units)
+
+        # NOTE: the file modified after it was stat'ed keeps the stale stat, so it is parsed again on the next build
+        units_modified = [u for u in units if self.__parsed.get(u[0], (None, None))[:2] != (snapshot[u[0]], u)]
+        for (registry_local, errors_syntax, tokens, cached, _, source), unit in zip(eg._parse_units(units_modified, self.__config), units_modified):
+
+            self.__parsed[unit[0]] = (snapshot[unit[0]], unit, registry_local, errors_syntax, tokens, cached, source)
+            result['parsed'] += 1
+
+        self.__parsed = {u[0]: self.__parsed[u[0]] for u in units}
+        self.__snapshot = snapshot
+
+        # NOTE: only the parsing is incremental, the whole registry is linked again on every build
+        linker = ln.Linker()
+        abspaths_modified = {u[0] for u in units_modified}
+
+        inputs = {}
+        for abspath, relpath, modulepath in units:
+
+            _, _, registry_local, errors_syntax, tokens, cached, inputs[relpath] = self.__parsed[abspath]
+            if abspath in abspaths_modified or len(errors_syntax) > 0:
+                result['errors'] += eg._log_parsed(modulepath, errors_syntax, tokens, cached)
+
+            linker.register(registry_local)
+
+        if len(result['errors']) > 0:
+            return result
+
+        result['errors'] = eg._link(linker)
+        if len(result['errors']) > 0:
+            return result
+
+        result['errors'], written, skipped = eg._generate(self.__config, linker, self.__backend, inputs=inputs)
+        result.update(success=len(result['errors']) == 0, written=len(written), skipped=len(skipped))
+
+        return result
+
+
+def _build_guarded(build) -> dict:
+
+    # NOTE: a failed build (e.g. an input which couldn't be decoded) shouldn't stop
+    # neither the polling nor the daemon, the next build is requested on the next change
+    try:
+        return build()
+
+    except Exception as e:
+
+        logger.exception('Build failed unexpectedly')
+        return {'success': False, 'parsed': 0, 'written': 0, 'skipped': 0, 'errors': [str(e)]}
+
+
+def _serve(listener: Listener, build):
+
+    while True:
+
+        try:
+            connection = listener.accept()
+        except OSError:
+            # NOTE: the listener was closed
+            return
+
+        with connection:
+
+            # NOTE: only plain JSON messages are exchanged, nothing is unpickled from the socket
+            try:
+
+                request = json.loads(connection.recv_bytes(4096))
+                if request.get('command') == 'build':
+                    reply = _build_guarded(build)
+                else:
+                    reply = {'success': False, 'error': f'Unknown command: `{request.get("command")}`'}
+
+                connection.send_bytes(json.dumps(reply).encode())
+
+            except (EOFError, OSError, ValueError, AttributeError) as e:
+                logger.warning(f'Bad request: {e}')
+
+
+def watch(config: EpiGenConfig, manifest: EpiGenManifest, interval: float = 0.5, address: str = None):
+
+    os.makedirs(config.dir_output, exist_ok=True)
+    os.makedirs(config.dir_output_build, exist_ok=True)
+
+    with eg._logging(config):
+        _watch(config, manifest, interval, address)
+
+
+def _watch(config: EpiGenConfig, manifest: EpiGenManifest, interval: float, address: str):
+
+    logger.info(f'Watching: {config.dir_input} (every {interval}s)')
+
+    workspace = Workspace(config, manifest)
+    lock = threading.Lock()
+
+    def _build() -> dict:
+
+        with lock:
+
+            time_start = time.perf_counter()
+            result = _build_guarded(workspace.build)
+            logger.info(f'Build {"succeeded" if result["success"] else "failed"} in {time.perf_counter() - time_start:.3f}s')
+
+            return result
+
+    listener = None
+    if address is not None:
+
+        # NOTE: the socket file left by a killed daemon would prevent the listener from binding
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.remove(address)
+
+        listener = Listener(address)
+        threading.Thread(target=_serve, args=(listener, _build), daemon=True).start()
+
+        logger.info(f'Listening: {address}')
+
+    try:
+
+        _build()
+        while True:
+
+            time.sleep(interval)
+
+            try:
+                modified = workspace.modified()
+            except OSError:
+                modified = True
+
+            if modified:
+                _build()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+
+        if listener is not None:
+            listener.close()
+
+
+def build_remote(address: str) -> dict:
+
+    with Client(address) as connection:
+
+        connection.send_bytes(json.dumps({'command': 'build'}).encode())
+        return json.loads(connection.recv_bytes())
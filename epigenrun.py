@@ -1,5 +1,3 @@
-from epigen import epigen
-
 from epigen.config import EpiGenConfig
 from epigen.config import EpiGenManifest
 
@@ -26,8 +24,7 @@ if __name__ == '__main__':
     grp_required.add_argument(
         '-i',
         '--dir-input',
-        type=str,
-        required=True
+        type=str
     )
 
     grp_optional.add_argument(
@@ -62,6 +59,19 @@ if __name__ == '__main__':
         action='store_true'
     )
 
+    grp_optional.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1
+    )
+
+    grp_optional.add_argument(
+        '--fsync',
+        action='store_true',
+        help='Flush every written file to the disk before it replaces the previous one'
+    )
+
     grp_optional.add_argument(
         '--ignore-list',
         action="extend",
@@ -70,6 +80,45 @@ if __name__ == '__main__':
         default=[]
     )
 
+    grp_optional.add_argument(
+        '--profile',
+        action='store_true',
+        help='Dump the per-stage timings and counters into `<dir-output-build>/epigen-profile.json`'
+    )
+
+    grp_optional.add_argument(
+        '--profile-cprofile',
+        action='store_true',
+        help='Along with `--profile` dump the cProfile stats of the whole run into `<dir-output-build>/epigen-profile.prof`'
+    )
+
+    grp_optional.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and rebuild whenever an input file is modified'
+    )
+
+    grp_optional.add_argument(
+        '--watch-interval',
+        type=float,
+        default=0.5,
+        help='The interval (in seconds) the input files are polled with'
+    )
+
+    grp_optional.add_argument(
+        '--serve',
+        type=str,
+        metavar='ADDRESS',
+        help='Run in the watch mode and accept the build requests on the local socket (a path or `\\\\.\\pipe\\<name>` on Windows)'
+    )
+
+    grp_optional.add_argument(
+        '--connect',
+        type=str,
+        metavar='ADDRESS',
+        help='Request a build from the daemon listening on the local socket and wait for it'
+    )
+
     grp_optional.add_argument(
         '--print-dependencies',
         action='store_true'
@@ -82,6 +131,18 @@ if __name__ == '__main__':
 
     args = argparser.parse_args()
 
+    if args.connect is not None:
+
+        from epigen import watch
+
+        result = watch.build_remote(args.connect)
+        print(f'Files parsed: {result["parsed"]}, written: {result["written"]}, skipped as unchanged: {result["skipped"]}')
+
+        exit(0 if result['success'] else -1)
+
+    if args.dir_input is None:
+        argparser.error('the following arguments are required: -i/--dir-input')
+
     dir_output = args.dir_output if args.dir_output is not None else args.dir_input
     dir_output_build = args.dir_output_build if args.dir_output_build is not None else dir_output
 
@@ -90,17 +151,27 @@ if __name__ == '__main__':
     config.debug = args.debug
     config.backup = args.backup
     config.caching = args.no_caching is None or not args.no_caching
+    config.jobs = args.jobs
+    config.fsync = args.fsync
+    config.profile = args.profile or args.profile_cprofile
+    config.profile_cprofile = args.profile_cprofile
 
+    # NOTE: the query modes are run many times per configure step, so they import
+    # the discovery only, while the rest of the subsystems is imported for the build
     if args.print_dependencies:
 
-        dependencies = epigen.epigen_dependencies(config)
+        from epigen import discovery
+
+        dependencies = discovery.dependencies(config)
         print(';'.join(dependencies).replace('\\', '/'))
 
         exit(0)
 
     if args.print_outputs:
 
-        outputs = epigen.epigen_outputs(config)
+        from epigen import discovery
+
+        outputs = discovery.outputs(config)
         print(';'.join(outputs).replace('\\', '/'))
 
         exit(0)
@@ -114,4 +185,14 @@ if __name__ == '__main__':
 
         manifest = EpiGenManifest(**manifest_json)
 
-    epigen.epigen(config, manifest)
+    if args.watch or args.serve is not None:
+
+        from epigen import watch
+
+        watch.watch(config, manifest, args.watch_interval, args.serve)
+        exit(0)
+
+    from epigen import epigen
+
+    result = epigen.epigen(config, manifest)
+    exit(0 if result.success else -1)
@@ -3,9 +3,64 @@ from pytest import Session
 from pytest import Item
 
 from epigen.symbol import EpiSymbol
+from epigen.config import EpiGenConfig
+from epigen.config import EpiGenManifest
 
 from typing import List
 
+import os
+
+
+class Project:
+
+    def __init__(self, tmpdir: str):
+
+        self.tmpdir = str(tmpdir)
+        self.dirpath = os.path.join(self.tmpdir, 'input')
+
+        os.makedirs(self.dirpath)
+
+    @property
+    def manifest(self) -> EpiGenManifest:
+        return EpiGenManifest(**{'modules': [self.dirpath]})
+
+    def write(self, files: dict):
+
+        for relpath, content in files.items():
+
+            path = os.path.join(self.dirpath, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(path, 'w') as f:
+                f.write(content)
+
+    def config(self, output: str = 'output', output_build: str = None, **fields) -> EpiGenConfig:
+
+        # NOTE: the build directory is the output one unless it's given
+        dir_output = os.path.join(self.tmpdir, output)
+        dir_output_build = os.path.join(self.tmpdir, output_build) if output_build is not None else dir_output
+
+        config = EpiGenConfig(self.dirpath, dir_output, dir_output_build)
+        for name, value in fields.items():
+            setattr(config, name, value)
+
+        return config
+
+
+@pytest.fixture(scope='session', autouse=True)
+def cache_home(tmp_path_factory):
+
+    # NOTE: the key of the parser cache is kept in the cache directory of the user, which the tests shouldn't touch
+    with pytest.MonkeyPatch.context() as monkeypatch:
+
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path_factory.mktemp('cache_home')))
+        yield
+
+
+@pytest.fixture
+def project(tmpdir: str) -> Project:
+    return Project(tmpdir)
+
 
 def pytest_configure(config):
 
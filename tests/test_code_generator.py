@@ -3,8 +3,49 @@ from epigen import epigen
 from epigen.config import EpiGenConfig
 from epigen.config import EpiGenManifest
 
+from epigen.code_generator import code_generator_document as doc
+from epigen.code_generator import code_generator_database as db
+from epigen.code_generator import code_generator_writer as wrt
+from epigen.code_generator import code_generator_backend as bk
+
+from epigen import profiler as prof
+
 import pytest
 import os
+import json
+import sqlite3
+import logging
+import threading
+
+
+def _backend_of(name: str) -> bk.Backend:
+    return bk.MemoryBackend() if name == 'memory' else bk.FileSystemBackend()
+
+
+def _outputs_of(backend: bk.Backend, dirpath: str) -> dict:
+
+    # NOTE: maps the paths (relative to `dirpath`) of the generated files to their content
+    dirpath = os.path.abspath(dirpath)
+    exts = ['.h', '.hxx', '.cpp', '.cxx']
+
+    if isinstance(backend, bk.MemoryBackend):
+
+        return {
+            os.path.relpath(path, dirpath): content
+            for path, content in backend.files.items()
+            if path.startswith(os.path.join(dirpath, '')) and os.path.splitext(path)[1] in exts
+        }
+
+    outputs = {}
+    for root, _, files in os.walk(dirpath):
+
+        for f in filter(lambda f: os.path.splitext(f)[1] in exts, files):
+
+            path = os.path.join(root, f)
+            with open(path, 'r') as fd:
+                outputs[os.path.relpath(path, dirpath)] = fd.read()
+
+    return outputs
 
 
 @pytest.mark.order(3)
@@ -64,8 +105,13 @@ class TestCodeGenerator:
             ]
         ),
     ])
-    def test_sequence(self, tmpdir: str, dirpath: str, modules: list):
+    @pytest.mark.parametrize('jobs', [1, 2])
+    @pytest.mark.parametrize('backend', ['filesystem', 'memory'])
+    def test_sequence(self, tmpdir: str, dirpath: str, modules: list, jobs: int, backend: str):
+
+        backend = _backend_of(backend)
 
+        mtimes = {}
         for iteration in range(4):
 
             config = EpiGenConfig(dirpath, tmpdir, tmpdir)
@@ -73,32 +119,503 @@ class TestCodeGenerator:
             config.debug = False
             config.backup = False
             config.caching = iteration not in [0, 1]
+            config.jobs = jobs
 
             manifest = EpiGenManifest(**{'modules': modules})
 
-            epigen.epigen(config, manifest)
+            epigen.epigen(config, manifest, backend)
+
+            outputs = _outputs_of(backend, tmpdir)
+            assert len(outputs) > 0
+
+            for relpath, content in outputs.items():
+
+                abspath = os.path.abspath(os.path.join(tmpdir, relpath))
+
+                abspath_exp = os.path.join(config.dir_input, relpath)
+                filename = os.path.splitext(abspath_exp)[0]
+                ext = os.path.splitext(abspath_exp)[1]
+                abspath_exp = f'{filename}.ref{ext}'
+
+                with open(abspath_exp, 'r') as expected_f:
+                    content_exp = expected_f.read()
+
+                assert content == content_exp, f'Checking {abspath} (len={len(content)} == len-exp={len(content_exp)})'
+
+                # NOTE: the files with the unchanged content shouldn't be rewritten
+                mtime = backend.stat(abspath)[1]
+                assert mtimes.setdefault(abspath, mtime) == mtime, f'{abspath} was rewritten on the iteration {iteration}'
+
+        # NOTE: nothing is written on the disk, neither the outputs nor the log and the caches
+        if isinstance(backend, bk.MemoryBackend):
+            assert len(_outputs_of(bk.FileSystemBackend(), tmpdir)) == 0
+            assert not any(os.path.exists(os.path.join(tmpdir, f)) for f in ['epigen.log', 'epigen-cache.db', 'epigen-cache-idl', 'epigen-discovery.json'])
+
+    def test_sequence_modified(self, project):
+
+        config = project.config(output_build='build')
+
+        for name in ['Name', 'NameModified']:
+
+            project.write({'test.epi': f'class A {{ epiS32 Value; }};\nclass B {{ epiS32 {name}; }};\n'})
+            epigen.epigen(config, project.manifest)
+
+        # NOTE: every symbol of the modified file should be regenerated, not only the first one
+        with open(os.path.join(config.dir_output, 'test.h'), 'r') as f:
+            content = f.read()
+
+        assert 'm_NameModified' in content and 'm_Name;' not in content
+
+    def test_sequence_modified_racy(self, project):
+
+        config = project.config(output_build='build')
+
+        project.write({'test.epi': 'class A { epiS32 Value; };\n'})
+        epigen.epigen(config, project.manifest)
+
+        path = os.path.join(project.dirpath, 'test.epi')
+        st = os.stat(path)
+
+        # NOTE: the file modified again within the mtime granularity keeps both its size and mtime
+        project.write({'test.epi': 'class A { epiS32 Eulav; };\n'})
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        result = epigen.epigen(config, project.manifest)
+        assert result.success and len(result.written) > 0
+
+        with open(os.path.join(config.dir_output_build, 'test.hxx'), 'r') as f:
+            assert 'm_Eulav' in f.read()
+
+    def test_memory_flush(self, project):
+
+        config = project.config()
+        backend = bk.MemoryBackend()
+
+        project.write({f'{name}.epi': f'class {name.upper()} {{ epiS32 Value; }};\n' for name in ['a', 'b']})
+        epigen.epigen(config, project.manifest, backend)
+
+        # NOTE: nothing is written on the disk until the backend is flushed
+        outputs = _outputs_of(backend, config.dir_output)
+        assert len(outputs) == 8 and not os.path.exists(config.dir_output)
+
+        written, skipped = backend.flush()
+        assert len(written) == 8 and len(skipped) == 0
+        assert _outputs_of(bk.FileSystemBackend(), config.dir_output) == outputs
+
+        project.write({'b.epi': 'class B { epiS32 ValueModified; };\n'})
+        epigen.epigen(config, project.manifest, backend)
+
+        # NOTE: only the difference is flushed
+        written, skipped = backend.flush()
+        assert sorted(os.path.basename(p) for p in written) == ['b.cxx', 'b.h', 'b.hxx']
+        assert len(skipped) == 5
+        assert _outputs_of(bk.FileSystemBackend(), config.dir_output) == _outputs_of(backend, config.dir_output)
+
+    def test_sequence_corrupted(self, project, caplog, request):
+
+        # NOTE: the records of the build aren't propagated to the root logger, so they're captured on the logger itself
+        logger = logging.getLogger('epigen')
+        logger.addHandler(caplog.handler)
+        request.addfinalizer(lambda: logger.removeHandler(caplog.handler))
+
+        project.write({f'{name}.epi': f'class {name.upper()} {{ epiS32 Value; }};\n' for name in ['a', 'b', 'c']})
+
+        errors = []
+        for jobs in [1, 2]:
+
+            config = project.config(f'output{jobs}', caching=False, jobs=jobs)
+            epigen.epigen(config, project.manifest)
+
+            for name in ['b', 'c']:
+
+                path = os.path.join(config.dir_output, f'{name}.h')
+                with open(path, 'r') as f:
+                    content = f.read()
+
+                with open(path, 'w') as f:
+                    f.write(content.replace(f'EPI_GENREGION_END({name.upper()})', ''))
+
+            caplog.clear()
+            result = epigen.epigen(config, project.manifest)
+
+            assert not result.success and len(result.written) == 0
+            assert result.errors == [r.getMessage() for r in caplog.records if r.levelname == 'ERROR']
+
+            errors.append([e.replace(config.dir_output, '') for e in result.errors])
+
+        # NOTE: the parallel code generation should report the same error as the serial one
+        assert len(errors[0]) == 1 and errors[0] == errors[1]
+
+    def test_reentrant(self, project):
+
+        config = project.config(log_stderr=False)
+
+        handlers_root = logging.getLogger().handlers[:]
+        level_root = logging.getLogger().level
+
+        contents = [
+            'class A { epiS32 Value; };\n',
+            'class A { epiS32 Value; ',
+            'class A : Unknown { epiS32 Value; };\n',
+            'class A { epiS32 Value; };\n'
+        ]
+
+        results = []
+        for _ in range(10):
+
+            for content in contents:
+
+                project.write({'a.epi': content})
+                results.append(epigen.epigen(config, project.manifest))
+
+                # NOTE: nothing is left attached to the loggers between the runs
+                assert logging.getLogger('epigen').handlers == []
+                assert logging.getLogger('epigen').propagate and logging.getLogger('epigen').level == logging.NOTSET
+                assert logging.getLogger().handlers == handlers_root
+                assert logging.getLogger().level == level_root
+
+        assert results[0].success and results[0].parsed == 1 and len(results[0].written) == 4
+        assert not results[1].success and len(results[1].errors) > 0 and len(results[1].written) == 0
+        assert not results[2].success and len(results[2].errors) == 1 and len(results[2].written) == 0
+
+        # NOTE: the input is the same as the one the outputs were generated from, so nothing is dirty
+        assert results[3].success and len(results[3].written) == 0 and len(results[3].skipped) == 0
+
+        for i, result in enumerate(results[4:]):
+            assert result.success == results[i % 4].success and result.errors == results[i % 4].errors
+
+        for stage in ['discovery', 'parse', 'link', 'codegen', 'dump']:
+            assert 0.0 <= results[0].timings[stage] <= results[0].seconds
+
+    def test_logging_propagation(self, project, request):
+
+        config = project.config(log_stderr=False)
+        project.write({'a.epi': 'class A { epiS32 Value; };\n'})
+
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+
+        logging.getLogger().addHandler(handler)
+        request.addfinalizer(lambda: logging.getLogger().removeHandler(handler))
+
+        assert epigen.epigen(config, project.manifest).success
+
+        # NOTE: the records of the build are handled by its own handlers only, not by the ones of the embedder
+        assert [r for r in records if r.name == 'epigen'] == []
+
+        with open(os.path.join(config.dir_output_build, 'epigen.log'), 'r') as f:
+            assert 'Files written' in f.read()
+
+    def test_unresolved_module(self, project):
+
+        project.write({'a.epi': 'class A { epiS32 Value; };\n'})
+
+        config = project.config(caching=False, log_stderr=False)
+        result = epigen.epigen(config, EpiGenManifest(**{'modules': [os.path.join(project.tmpdir, 'unknown')]}))
+
+        assert not result.success and result.parsed == 0
+        assert len(result.errors) == 1 and 'a.epi' in result.errors[0]
+
+    @pytest.mark.parametrize('content_modified', [
+        'class Type { epiS32 Value; };\n',
+        'enum Type { Value, ValueModified };\n'
+    ])
+    @pytest.mark.parametrize('backend', ['filesystem', 'memory'])
+    def test_sequence_dependents(self, project, content_modified: str, backend: str):
+
+        backend = _backend_of(backend)
+
+        def _epigen(output: str, caching: bool) -> dict:
+
+            config = project.config(output, caching=caching)
+            epigen.epigen(config, project.manifest, backend)
+
+            return _outputs_of(backend, config.dir_output)
+
+        project.write({
+            'type.epi': 'enum Type { Value };\n',
+            'dependent.epi': 'class Dependent { Type Value; };\n',
+            'dependent_transitive.epi': 'class DependentTransitive : Dependent { epiArray<Dependent> Values; };\n',
+            'independent.epi': 'class Independent { epiS32 Value; };\n'
+        })
+
+        _epigen('incremental', caching=True)
 
-            for root, _, files in os.walk(tmpdir):
+        project.write({'type.epi': content_modified})
 
-                for f in filter(lambda f: f.endswith('h') or f.endswith('hxx') or f.endswith('cpp') or f.endswith('cxx'), files):
+        outputs_incremental = _epigen('incremental', caching=True)
+        outputs_clean = _epigen('clean', caching=False)
 
-                    abspath = os.path.join(os.path.relpath(root, tmpdir), f)
-                    abspath = os.path.normpath(abspath)
-                    abspath = os.path.join(tmpdir, abspath)
-                    abspath = os.path.abspath(abspath)
+        # NOTE: the incremental build should regenerate the dependents of the modified file
+        # (the modified file itself is skipped, since its `.h` keeps the skeleton of the symbol once it was generated)
+        for filename, content in outputs_clean.items():
 
-                    relpath = os.path.relpath(abspath, tmpdir)
-                    relpath = os.path.normpath(relpath)
+            if not filename.startswith('type.'):
+                assert outputs_incremental[filename] == content, f'{filename} is stale'
+
+    def test_profile_concurrent(self):
+
+        barrier = threading.Barrier(2)
+        reports = [None, None]
+
+        def _run(i: int):
+
+            prof.start()
+            barrier.wait()
+
+            with prof.stage(f'stage{i}'):
+                prof.count('counter', i + 1)
+
+            barrier.wait()
+            reports[i] = prof.stop().report()
+
+        threads = [threading.Thread(target=_run, args=(i,)) for i in range(2)]
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        # NOTE: every thread profiles its own build
+        assert not prof.enabled()
+
+        for i, report in enumerate(reports):
+
+            assert list(report['stages'].keys()) == [f'stage{i}']
+            assert report['counters'] == {'counter': i + 1}
+
+    def test_profile(self, project):
+
+        config = project.config(output_build='build', profile=True)
+
+        project.write({'test.epi': 'enum E { Value };\nclass A { E Value; };\n'})
+        epigen.epigen(config, project.manifest)
+
+        with open(os.path.join(config.dir_output_build, 'epigen-profile.json'), 'r') as f:
+            report = json.load(f)
+
+        for stage in ['discovery', 'parse', 'register', 'link', 'link.inheritance', 'codegen', 'codegen.emit', 'codegen.inject', 'dump']:
+
+            stats = report['stages'][stage]
+            assert stats['calls'] > 0 and 0.0 <= stats['wall_self'] <= stats['wall']
+
+        assert report['counters']['inputs'] == 1
+        assert report['counters']['symbols'] == 2
+        assert report['counters']['outputs_dirty'] == 4
+        assert report['counters']['files_written'] == 4
+        assert report['counters']['bytes_written'] > 0
+
+        assert report['files']['test.epi']['tokens'] == 14
+        assert not report['files']['test.epi']['cached']
+
+    @pytest.mark.parametrize('backend', ['filesystem', 'memory'])
+    def test_failure_rollback(self, project, backend: str):
+
+        config = project.config(log_stderr=False)
+        backend = _backend_of(backend)
+
+        project.write({'a.epi': 'class A { epiS32 Value; };\n'})
+        assert epigen.epigen(config, project.manifest, backend).success
+
+        path = os.path.join(config.dir_output, 'a.h')
+        content = backend.read(path)
+
+        project.write({'a.epi': 'class A { epiS32 ValueModified; };\n'})
+
+        backend.write([(path, content.replace('EPI_GENREGION_END(A)', ''))])
+        assert not epigen.epigen(config, project.manifest, backend).success
+
+        # NOTE: the input of the failed build is still seen as modified by the backend which is kept
+        backend.write([(path, content)])
+        assert epigen.epigen(config, project.manifest, backend).success
+
+        assert 'ValueModified' in backend.read(os.path.join(config.dir_output_build, 'a.hxx'))
+
+    def test_writer_makedirs(self, tmpdir: str, monkeypatch):
+
+        monkeypatch.chdir(tmpdir)
+
+        outputs = [
+            (os.path.join('a', 'b-x', 'y', 'file.h'), 'content-y'),
+            (os.path.join('a', 'b', 'file.h'), 'content-b'),
+            (os.path.join('a', 'file.h'), 'content-a'),
+            ('file.h', 'content')
+        ]
+
+        # NOTE: the directory which is a prefix of its sibling isn't skipped,
+        # while the current one (the empty dirname of the relative path) isn't created at all
+        assert wrt.OutputWriter(1).write(outputs) == ([path for path, _ in outputs], [])
+        assert wrt.OutputWriter(1).write([('file-cwd.h', 'content')]) == (['file-cwd.h'], [])
+
+        for path, content in outputs:
+
+            with open(path, 'r') as f:
+                assert f.read() == content
+
+    @pytest.mark.parametrize('jobs', [1, 4])
+    @pytest.mark.parametrize('fsync', [False, True])
+    def test_writer(self, tmpdir: str, jobs: int, fsync: bool):
+
+        outputs = [
+            (os.path.join(tmpdir, 'a', 'b', 'c', 'file.h'), 'content-c'),
+            (os.path.join(tmpdir, 'a', 'b', 'file.h'), 'content-b'),
+            (os.path.join(tmpdir, 'a', 'b-c', 'file.h'), 'content-b-c'),
+            (os.path.join(tmpdir, 'd', 'file.h'), 'content-d'),
+            (os.path.join(tmpdir, 'file.h'), 'content')
+        ]
+
+        writer = wrt.OutputWriter(jobs, fsync)
+        assert writer.write(outputs) == ([path for path, _ in outputs], [])
+
+        # NOTE: the new files get the same mode the files created by `open` do
+        with open(os.path.join(tmpdir, 'reference'), 'w'):
+            mode = os.stat(os.path.join(tmpdir, 'reference')).st_mode & 0o777
+
+        for path, content in outputs:
+
+            with open(path, 'r') as f:
+                assert f.read() == content
+
+            assert os.stat(path).st_mode & 0o777 == mode
+
+        os.chmod(outputs[0][0], 0o600)
+
+        outputs_modified = [(path, f'{content}-modified' if i % 2 == 0 else content) for i, (path, content) in enumerate(outputs)]
+        written, skipped = writer.write(outputs_modified)
+
+        # NOTE: the unchanged files are skipped, while the modified ones keep their mode
+        assert written == [outputs[i][0] for i in [0, 2, 4]]
+        assert skipped == [outputs[i][0] for i in [1, 3]]
+        assert os.stat(outputs[0][0]).st_mode & 0o777 == 0o600
+
+        assert writer.bytes_written == sum(len(c) for _, c in outputs) + sum(len(outputs_modified[i][1]) for i in [0, 2, 4])
+        assert writer.throughput > 0.0
+
+        assert not any(f.endswith('.tmp') for _, _, files in os.walk(tmpdir) for f in files)
+
+    @pytest.mark.parametrize('fingerprint,corrupted', [
+        ('fingerprint', False),
+        ('fingerprint-modified', False),
+        ('fingerprint', True)
+    ])
+    def test_database(self, tmpdir: str, fingerprint: str, corrupted: bool):
+
+        path = os.path.join(tmpdir, 'epigen-cache.db')
+
+        database = db.BuildDatabase(path, 'fingerprint')
+        database.input_store('a.epi', 'digest-a', (1, 2), 3)
+        database.output_store('a.h', 'a.epi', 'digest-h', (3, 4))
+        database.symbols_store('a.epi', ['A', 'B'])
+        database.commit()
+
+        database = db.BuildDatabase(path, 'fingerprint')
+        database.symbols_store('a.epi', ['A', 'C'])
+        database.commit()
+
+        if corrupted:
+            with open(path, 'wb') as f:
+                f.write(b'corrupted')
+
+        database = db.BuildDatabase(path, fingerprint)
+
+        # NOTE: the database is invalidated entirely once the generator has been changed
+        if fingerprint == 'fingerprint' and not corrupted:
+
+            assert database.input('a.epi') == ('digest-a', (1, 2), 3)
+            assert database.output('a.h') == ('digest-h', (3, 4))
+            assert database.symbols() == {'A': 'a.epi', 'C': 'a.epi'}
+
+        else:
+
+            assert database.input('a.epi') is None
+            assert database.output('a.h') is None
+            assert database.symbols() == {}
+
+    @pytest.mark.parametrize('path', [None, db.BuildDatabase.MEMORY])
+    def test_database_recovered(self, tmpdir: str, monkeypatch, path: str):
+
+        path = path if path is not None else os.path.join(tmpdir, 'epigen-cache.db')
+        load = db.BuildDatabase._load
+
+        failures = [sqlite3.DatabaseError('file is not a database')]
+        def _load(database):
+
+            if len(failures) > 0:
+                raise failures.pop()
+
+            load(database)
+
+        # NOTE: the database which couldn't be loaded is recreated and usable afterwards
+        monkeypatch.setattr(db.BuildDatabase, '_load', _load)
+        database = db.BuildDatabase(path, 'fingerprint')
+
+        database.input_store('a.epi', 'digest-a', (1, 2), 3)
+        database.commit()
+        database.rollback()
+
+        assert database.input('a.epi') == ('digest-a', (1, 2), 3)
+
+    @pytest.mark.parametrize('content,injections,expected', [
+        (
+            'a\nEPI_GENREGION_BEGIN(A)\nold\nEPI_GENREGION_END(A)\nb',
+            [('new', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')],
+            'a\nEPI_GENREGION_BEGIN(A)newEPI_GENREGION_END(A)\nb'
+        ),
+        (
+            'EPI_NAMESPACE_BEGIN()\nEPI_NAMESPACE_END()\n',
+            [
+                ('EPI_GENREGION_BEGIN(A)\nEPI_GENREGION_END(A)\n', 'EPI_NAMESPACE_END()', None),
+                ('\nnew\n', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)'),
+                ('\nnewer\n', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')
+            ],
+            'EPI_NAMESPACE_BEGIN()\nEPI_GENREGION_BEGIN(A)\nnewer\nEPI_GENREGION_END(A)\nEPI_NAMESPACE_END()\n'
+        ),
+        (
+            'EPI_GENREGION_BEGIN(A)EPI_GENREGION_BEGIN(B)EPI_GENREGION_END(B)EPI_GENREGION_END(A)',
+            [
+                ('EPI_GENREGION_BEGIN(B)', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)'),
+                ('\n', None, 'EPI_GENREGION_BEGIN(B)'),
+                ('tail', None, None)
+            ],
+            'EPI_GENREGION_BEGIN(A)EPI_GENREGION_BEGIN(B)\nEPI_GENREGION_END(A)tail'
+        ),
+        (
+            'EPI_GENREGION_BEGIN(A)EPI_GENREGION_END(A)EPI_GENREGION_END(A)',
+            [('new', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')],
+            'There is a duplicating anchor: `EPI_GENREGION_END(A)`'
+        ),
+        (
+            'EPI_GENREGION_BEGIN(A)EPI_GENREGION_BEGIN(A)EPI_GENREGION_END(A)',
+            [('new', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')],
+            'There is a duplicating anchor: `EPI_GENREGION_BEGIN(A)`'
+        ),
+        (
+            'EPI_GENREGION_BEGIN(A)',
+            [('new', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')],
+            "Can't find `EPI_GENREGION_END(A)` anchor"
+        ),
+        (
+            'EPI_GENREGION_END(A)',
+            [('new', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')],
+            "Can't find `EPI_GENREGION_BEGIN(A)` anchor"
+        ),
+        (
+            'EPI_GENREGION_END(A)EPI_GENREGION_BEGIN(A)',
+            [('new', 'EPI_GENREGION_END(A)', 'EPI_GENREGION_BEGIN(A)')],
+            '`EPI_GENREGION_END(A)` anchor precedes `EPI_GENREGION_BEGIN(A)` anchor'
+        ),
+    ])
+    def test_document(self, content: str, injections: list, expected: str):
 
-                    abspath_exp = os.path.join(config.dir_input, relpath)
-                    filename = os.path.splitext(abspath_exp)[0]
-                    ext = os.path.splitext(abspath_exp)[1]
-                    abspath_exp = f'{filename}.ref{ext}'
+        document = doc.Document(content)
 
-                    with open(abspath_exp, 'r') as expected_f:
-                        content_exp = expected_f.read()
+        try:
+            for inj, before, after in injections:
+                document.inject(inj, before=before, after=after)
 
-                    with open(abspath, 'r') as f:
-                        content = f.read()
+        except doc.DocumentError as e:
+            assert str(e) == expected
+            return
 
-                    assert content == content_exp, f'Checking {abspath} (len={len(content)} == len-exp={len(content_exp)})'
+        assert str(document) == expected
@@ -0,0 +1,75 @@
+from epigen import discovery
+from epigen.config import EpiGenConfig
+import pytest
+import os
+import fnmatch
+
+
+@pytest.mark.order(4)
+class TestDiscovery:
+
+    @pytest.mark.parametrize('ignore_list', [
+        [],
+        ['*subfolder*'],
+        ['*.epi'],
+        ['subfolder/*', 'sample-*', '*2.epi']
+    ])
+    def test_discovery(self, tmpdir: str, ignore_list: list):
+
+        config = EpiGenConfig('tests/data/samples', tmpdir, tmpdir)
+        config.ignore_list = ignore_list
+        config.caching = True
+
+        expected = []
+        for root, _, files in os.walk(config.dir_input):
+
+            for epifile in filter(lambda f: f.endswith('epi'), files):
+
+                relpath = os.path.normpath(os.path.join(os.path.relpath(root, config.dir_input), epifile))
+                if not any(fnmatch.fnmatch(relpath, p) for p in config.ignore_list):
+                    expected.append(relpath)
+
+        assert discovery.discover(config) == expected
+        assert os.path.exists(os.path.join(tmpdir, 'epigen-discovery.json'))
+
+        # NOTE: the cached manifest is used as long as no directory has been modified
+        assert discovery.discover(config) == expected
+
+    def test_discovery_modified(self, project):
+
+        config = project.config('.')
+        os.makedirs(os.path.join(project.dirpath, 'subfolder'))
+
+        def _touch(relpath: str, mtime_ns: int):
+
+            path = os.path.join(project.dirpath, relpath)
+            if not os.path.exists(path):
+                open(path, 'w').close()
+
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+        # NOTE: the directories are dated back, otherwise they are too recent to be trusted
+        mtime_ns = os.stat(project.dirpath).st_mtime_ns - 10 * 10 ** 9
+
+        _touch('a.epi', mtime_ns)
+        _touch('subfolder', mtime_ns)
+        _touch('.', mtime_ns)
+
+        assert discovery.discover(config) == ['a.epi']
+
+        path_manifest = os.path.join(config.dir_output_build, 'epigen-discovery.json')
+        with open(path_manifest, 'r') as f:
+            manifest = f.read()
+
+        assert discovery.discover(config) == ['a.epi']
+
+        with open(path_manifest, 'r') as f:
+            assert f.read() == manifest
+
+        _touch(os.path.join('subfolder', 'b.epi'), mtime_ns)
+        _touch('subfolder', mtime_ns + 10 ** 9)
+
+        assert discovery.discover(config) == ['a.epi', os.path.join('subfolder', 'b.epi')]
+
+        with open(path_manifest, 'r') as f:
+            assert f.read() != manifest
@@ -12,6 +12,9 @@ from epigen.symbol import EpiEnumEntry
 from epigen.symbol import EpiEnumEntryBuilder
 
 from epigen.idlparser import idlparser_base as idl
+from epigen.idlparser import idlparser_cache as idlcache
+from epigen import fingerprint as fp
+import os
 
 import pytest
 
@@ -1218,6 +1221,20 @@ class TestIDLParser:
             {},
             [idl.IDLSyntaxErrorCode.UnknownToken] * 2
         ),
+        (
+            '''
+            class A
+            {
+                epiS32
+            };
+            class B
+            {
+                epiS32 Value = @;
+            };
+            ''',
+            {},
+            [idl.IDLSyntaxErrorCode.UnknownToken]
+        ),
         (
             '''
             class A : B
@@ -2290,6 +2307,15 @@ class TestIDLParser:
 
         assert len(registry_local) == len(expected_registry)
 
+        parser = idl.IDLParser(Tokenizer(path, path, path).tokenize_iter())
+        registry_local_streamed, errors_syntax_streamed = parser.parse()
+
+        assert [repr(err) for err in errors_syntax_streamed] == [repr(err) for err in errors_syntax]
+        assert list(registry_local_streamed.keys()) == list(registry_local.keys())
+
+        for sym, sym_streamed in zip(registry_local.values(), registry_local_streamed.values()):
+            assert sym == sym_streamed
+
         return registry_local, errors_syntax
 
     @pytest.mark.parametrize('content,expected_registry,expected_errors', [
@@ -2951,3 +2977,114 @@ class TestIDLParser:
         }
 
         self.test_sequence(tmpdir, content, expected_registry, expected_errors)
+
+    @pytest.mark.parametrize('content', [
+        '',
+        'class A {};',
+        '''
+        enum EnumName
+        {
+            Value1,
+            Value2 = 123
+        };
+
+        class ClassName : ParentClassName
+        {
+            enum InnerEnumName { Value1 };
+
+            [ReadOnly]
+            epiArray<epiFloat> Name0;
+            epiString Name1 = "Hello";
+        };
+        ''',
+        'class A { epiS32 };'
+    ])
+    def test_cache(self, tmpdir: str, content: str):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write(content)
+
+        tokenizer = Tokenizer(path, path, path)
+        parser = idl.IDLParser(tokenizer.tokenize())
+        registry_local, errors_syntax = parser.parse()
+
+        cache = idlcache.IDLParserCache(f'{tmpdir}/cache')
+        digest = idlcache.IDLParserCache.digest(path)
+
+        assert cache.load(path, path, digest) is None
+
+        cache.store(path, path, digest, registry_local, errors_syntax)
+        registry_cached, errors_cached = cache.load(path, path, digest)
+
+        assert list(registry_cached.keys()) == list(registry_local.keys())
+
+        for sym, sym_cached in zip(registry_local.values(), registry_cached.values()):
+
+            assert sym == sym_cached
+            assert str(sym) == str(sym_cached)
+
+        assert [repr(e) for e in errors_cached] == [repr(e) for e in errors_syntax]
+
+        with open(path, 'a') as f:
+            f.write('\nclass B {};')
+
+        assert cache.load(path, path, idlcache.IDLParserCache.digest(path)) is None
+        assert cache.load(path, f'{path}.moved', digest) is None
+
+    def test_cache_forged(self, tmpdir: str, monkeypatch):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write('class A { epiS32 Value; };')
+
+        registry_local, errors_syntax = idl.IDLParser(Tokenizer(path, path, path).tokenize()).parse()
+
+        cache = idlcache.IDLParserCache(f'{tmpdir}/cache')
+        digest = idlcache.IDLParserCache.digest(path)
+
+        cache.store(path, path, digest, registry_local, errors_syntax)
+        assert cache.load(path, path, digest) is not None
+
+        with open(cache._filepath_of(path), 'rb') as f:
+            entry = f.read()
+
+        loads = []
+        monkeypatch.setattr(idlcache.pickle, 'loads', lambda payload: loads.append(payload))
+
+        # NOTE: neither the entry modified by someone else nor the one signed by another key is unpickled
+        with open(cache._filepath_of(path), 'wb') as f:
+            f.write(entry[:-1] + bytes([entry[-1] ^ 1]))
+
+        assert cache.load(path, path, digest) is None
+
+        with open(cache._filepath_of(path), 'wb') as f:
+            f.write(entry)
+
+        monkeypatch.setattr(idlcache, '_secret', lambda: b'forged')
+        assert cache.load(path, path, digest) is None
+
+        assert loads == []
+
+    def test_cache_invalidated(self, tmpdir: str, monkeypatch):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write('class A { epiS32 Value; };')
+
+        registry_local, errors_syntax = idl.IDLParser(Tokenizer(path, path, path).tokenize()).parse()
+
+        cache = idlcache.IDLParserCache(f'{tmpdir}/cache')
+        digest = idlcache.IDLParserCache.digest(path)
+
+        cache.store(path, path, digest, registry_local, errors_syntax)
+        cache.store(f'{path}.removed', path, digest, registry_local, errors_syntax)
+
+        # NOTE: the entries of the inputs which no longer exist are removed
+        cache.prune([path])
+        assert len(os.listdir(f'{tmpdir}/cache')) == 1
+        assert cache.load(path, path, digest) is not None
+
+        # NOTE: the entries parsed by the modified parser are stale
+        monkeypatch.setattr(fp, 'sources', lambda relpaths: 'modified')
+        assert cache.load(path, path, digest) is None
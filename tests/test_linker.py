@@ -64,7 +64,7 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 4
+            [ln.LinkerErrorCode.DuplicatingSymbol] * 2
         ),
         (
             [
@@ -155,6 +155,41 @@ class TestLinker:
             ],
             [ln.LinkerErrorCode.DuplicatingSymbol]
         ),
+        (
+            [
+                '''
+                class plumless {};
+                class buckeroo {};
+                '''
+            ],
+            [ln.LinkerErrorCode.HashCollision]
+        ),
+        (
+            [
+                '''
+                class plumless {};
+                ''',
+                '''
+                class buckeroo {};
+                '''
+            ],
+            [ln.LinkerErrorCode.HashCollision]
+        ),
+        (
+            [
+                '''
+                class plumless {};
+                ''',
+                '''
+                class buckeroo {};
+                enum plumless
+                {
+                    Name
+                };
+                '''
+            ],
+            [ln.LinkerErrorCode.HashCollision] * 2 + [ln.LinkerErrorCode.DuplicatingSymbol]
+        ),
         (
             [
                 '''
@@ -722,7 +757,7 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 2
+            [ln.LinkerErrorCode.DuplicatingSymbol]
         ),
         (
             [
@@ -740,7 +775,7 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 2
+            [ln.LinkerErrorCode.DuplicatingSymbol]
         ),
         (
             [
@@ -761,7 +796,7 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 7
+            [ln.LinkerErrorCode.DuplicatingSymbol] * 3
         ),
         (
             [
@@ -783,7 +818,7 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 7
+            [ln.LinkerErrorCode.DuplicatingSymbol] * 3
         ),
         (
             [
@@ -838,7 +873,44 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 6
+            [ln.LinkerErrorCode.DuplicatingSymbol] * 3
+        ),
+        (
+            [
+                '''
+                class PClassName
+                {
+                    epiS32 plumless;
+                };
+
+                class ClassName : PClassName
+                {
+                    epiS32 buckeroo;
+                };
+                '''
+            ],
+            [ln.LinkerErrorCode.HashCollision]
+        ),
+        (
+            [
+                '''
+                class PClassName
+                {
+                    epiS32 Name;
+                };
+
+                class AClassName : PClassName
+                {
+                    epiS32 Value;
+                };
+
+                class BClassName : PClassName
+                {
+                    epiS32 Value;
+                };
+                '''
+            ],
+            []
         ),
         (
             [
@@ -942,7 +1014,7 @@ class TestLinker:
                 };
                 '''
             ],
-            [ln.LinkerErrorCode.DuplicatingSymbol] * 6
+            [ln.LinkerErrorCode.DuplicatingSymbol] * 3
         ),
     ])
     def test_sequence(self, tmpdir: str, contents: list, expected_errors: list):
@@ -970,3 +1042,96 @@ class TestLinker:
             assert err.err_code == exp_err
 
         assert len(errors_linkage) == len(expected_errors), f'{errors_linkage} != {expected_errors}'
+
+    @pytest.mark.parametrize('contents,expected', [
+        (
+            [
+                '''
+                class A {};
+                class B : A {};
+                ''',
+                '''
+                enum E { Value };
+                '''
+            ],
+            {'A': set(), 'B': {'A'}, 'E': set()}
+        ),
+        (
+            [
+                '''
+                class Inner
+                {
+                    enum EnumName
+                    {
+                        Name
+                    };
+                };
+
+                enum E { Value };
+                class C {};
+                ''',
+                '''
+                class A
+                {
+                    Inner::EnumName Value0 = Inner::EnumName::Name;
+                    epiArray<C> Value1;
+                    E Value2;
+                    epiS32 Value3;
+                };
+                '''
+            ],
+            {'Inner': set(), 'E': set(), 'C': set(), 'A': {'Inner', 'C', 'E'}}
+        ),
+        (
+            [
+                '''
+                class Parent
+                {
+                    enum EnumName
+                    {
+                        Name
+                    };
+
+                    EnumName Value = EnumName::Name;
+                };
+
+                class Child : Parent
+                {
+                    EnumName Value1 = EnumName::Name;
+                };
+                ''',
+                '''
+                enum A
+                {
+                    Value1,
+                    Value2 = Value1 | B::Value1
+                };
+
+                enum B
+                {
+                    Value1
+                };
+                '''
+            ],
+            {'Parent': set(), 'Child': {'Parent'}, 'A': {'B'}, 'B': set()}
+        ),
+    ])
+    def test_dependencies(self, tmpdir: str, contents: list, expected: dict):
+
+        linker = ln.Linker()
+        for i, content in enumerate(contents):
+            path = f'{tmpdir}/test{i}.epi'
+
+            with open(path, 'w') as f:
+                f.write(content)
+
+            registry_local, errors_syntax = idl.IDLParser(Tokenizer(path, path, path).tokenize()).parse()
+
+            assert len(errors_syntax) == 0, f'{errors_syntax}'
+
+            linker.register(registry_local)
+
+        errors_linkage = linker.link()
+
+        assert len(errors_linkage) == 0, f'{errors_linkage}'
+        assert linker.dependencies() == expected
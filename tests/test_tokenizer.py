@@ -1,6 +1,8 @@
 import pytest
+import os
 
 from epigen.tokenizer import Tokenizer, TokenType
+from epigen import tokenizer as tkn
 
 
 @pytest.mark.order(0)
@@ -18,6 +20,68 @@ class TestTokenizer:
 
         assert len(tokens) == 0
 
+    def test_unmappable(self, tmpdir: str, monkeypatch):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write('class A { epiS32 Value; };')
+
+        def _mmap(*args, **kwargs):
+            raise OSError(19, 'No such device')
+
+        # NOTE: the file which couldn't be mapped is read instead
+        monkeypatch.setattr(tkn.mmap, 'mmap', _mmap)
+        tokens = Tokenizer(path, path, path).tokenize()
+
+        assert [t.text for t in tokens] == ['class', 'A', '{', 'epiS32', 'Value', ';', '}', ';']
+
+    def test_source_shared(self, tmpdir: str):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write('class A { epiS32 Value; };')
+
+        tokens = Tokenizer(path, 'relpath', 'modulepath').tokenize()
+        source = tokens[0].source
+
+        # NOTE: the source of the file is relocated at once for all of its tokens
+        tokens[0].relpath = 'relpath-moved'
+        tokens[0].modulepath = 'modulepath-moved'
+
+        assert all(t.source is source for t in tokens)
+        assert all(t.relpath == 'relpath-moved' and t.modulepath == 'modulepath-moved' for t in tokens)
+
+    @pytest.mark.skipif(not os.path.exists('/proc/self/maps'), reason='The mappings of the process are listed by procfs')
+    def test_closed(self, tmpdir: str):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write('class A { epiS32 Value; };')
+
+        def mapped() -> bool:
+
+            with open('/proc/self/maps', 'r') as f:
+                return path in f.read()
+
+        # NOTE: the file is unmapped once it's scanned, even if the tokens aren't pulled to the end
+        tokenizer = Tokenizer(path, path, path)
+        assert mapped()
+
+        tokenizer.tokenize()
+        assert not mapped()
+
+        tokens = Tokenizer(path, path, path).tokenize_iter()
+        next(tokens)
+        assert mapped()
+
+        tokens.close()
+        assert not mapped()
+
+        with Tokenizer(path, path, path):
+            assert mapped()
+
+        assert not mapped()
+
     @pytest.mark.parametrize('text,expected_type,expected_text', [
         ('class', [TokenType.ClassType], ['class']),
         ('enum', [TokenType.EnumType], ['enum']),
@@ -204,3 +268,73 @@ class TestTokenizer:
 
             assert exp_type == token.tokentype
             assert exp_text == token.text
+
+    @pytest.mark.parametrize('text', [
+        'class',
+        '_Name',
+        '12NameWithDigits12',
+        '   12NameWithDigits12  12 ',
+        "L'c'",
+        "L'\\0'",
+        'L"string"',
+        '" \\ string\\t "',
+        'L"  string \\t \\n "',
+        '+42',
+        '-42',
+        '42.0f',
+        '4200.000005f',
+        '+0042.0',
+        '-0.0',
+        'true',
+        '42f',
+        '42.0ff',
+        '420.05.00f;',
+        '420.0500',
+        "L'",
+        "L'a epiString",
+        'L"String epiS32',
+        'L "String epiS32',
+        '.52',
+        '42.f',
+        '42.0f0',
+        '++0',
+        '42.0000.005',
+        '# COMMENT epiS32; ;;; "As well as this is a comment"',
+        ' epiS32 Name   =   42  ;   # COMMENT epiS32; ;;; "As well as this is a comment"',
+        '  ; ; ; ; ;  ',
+        '::',
+        '&&',
+        '||',
+        '--',
+        '==',
+        "'",
+        '"',
+        '::EnumName',
+        'EnumName ClassScope::EnumName::EnumEntryName',
+        'epiFloat* *Name',
+        '[Min(5, Force=true)] epiS32 Name = 6;',
+        'class A\n{\n    epiS32 Name = 42;\n};\n',
+        '\n\n  class\tA : B # comment\n{ [ReadOnly]\n epiString  Name = "Str\\"ing";\n};',
+        '"multi\nline" \'a\' \'\n\' L\'\\n\' "tail\\',
+        '\n  42.0f 42.f0\n-12 +0.5 ;;\n; ;\n# comment only\n\'',
+        'Scope::Name::\nName ::Name Name:: é½ \x00 Ⅻ',
+        'class\x1cA\x1f{ epiS32\x0bName = -1;\n};',
+        'class A\r\n{\r\n    epiChar Name = \'\r\';\r\n};\r',
+        '',
+    ])
+    def test_sequence_legacy(self, tmpdir: str, text: str):
+
+        path = f'{tmpdir}/test.epi'
+        with open(path, 'w') as f:
+            f.write(text)
+
+        tokens = Tokenizer(path, 'relpath', 'modulepath').tokenize()
+        tokens_legacy = Tokenizer(path, 'relpath', 'modulepath', legacy=True).tokenize()
+
+        assert len(tokens) == len(tokens_legacy)
+
+        for token, token_legacy in zip(tokens, tokens_legacy):
+
+            assert token == token_legacy
+            assert str(token) == str(token_legacy)
+            assert token.tokentype_expected == token_legacy.tokentype_expected
@@ -0,0 +1,116 @@
+from epigen import watch
+import pytest
+import os
+import threading
+from multiprocessing.connection import Listener
+
+
+@pytest.mark.order(5)
+class TestWatch:
+
+    def test_watch(self, project):
+
+        config = project.config()
+        os.makedirs(config.dir_output)
+
+        project.write({f'{name}.epi': f'class {name.upper()} {{ epiS32 Value; }};\n' for name in ['a', 'b']})
+
+        workspace = watch.Workspace(config, project.manifest)
+
+        result = workspace.build()
+        assert result['success'] and result['parsed'] == 2 and result['written'] == 8
+
+        assert not workspace.modified()
+        assert workspace.build() == {'success': True, 'parsed': 0, 'written': 0, 'skipped': 0, 'errors': []}
+
+        project.write({'b.epi': 'class B : A { epiS32 ValueModified; };\n'})
+
+        # NOTE: only the modified file is parsed again, while the rest of the registry is kept in memory
+        assert workspace.modified()
+
+        result = workspace.build()
+        assert result['success'] and result['parsed'] == 1
+
+        with open(os.path.join(config.dir_output, 'b.h'), 'r') as f:
+            assert 'm_ValueModified' in f.read()
+
+        project.write({'b.epi': 'class B : Unknown {};\n'})
+
+        assert not workspace.build()['success']
+
+        os.remove(os.path.join(project.dirpath, 'b.epi'))
+
+        result = workspace.build()
+        assert result['success'] and result['parsed'] == 0
+
+    def test_watch_modified_while_building(self, project, monkeypatch):
+
+        config = project.config()
+        project.write({'a.epi': 'class A { epiS32 Value; };\n'})
+
+        link = watch.eg._link
+        def _link_modified(*args, **kwargs) -> list:
+
+            monkeypatch.setattr(watch.eg, '_link', link)
+            project.write({'a.epi': 'class A { epiS32 ValueModified; };\n'})
+
+            return link(*args, **kwargs)
+
+        monkeypatch.setattr(watch.eg, '_link', _link_modified)
+
+        workspace = watch.Workspace(config, project.manifest)
+        assert workspace.build()['success']
+
+        # NOTE: the outputs are generated from the version which was parsed, so the file
+        # modified after it was parsed should be generated again by the next build
+        assert workspace.modified()
+
+        result = workspace.build()
+        assert result['success'] and result['parsed'] == 1 and result['written'] > 0
+
+        with open(os.path.join(config.dir_output_build, 'a.hxx'), 'r') as f:
+            assert 'ValueModified' in f.read()
+
+    @pytest.mark.skipif(os.name != 'posix', reason='Unix domain sockets are required')
+    def test_watch_serve(self, tmpdir: str):
+
+        address = os.path.join(tmpdir, 'epigen.sock')
+
+        requests = []
+        def _build() -> dict:
+
+            requests.append(len(requests))
+            return {'success': True, 'parsed': 0, 'written': 0, 'skipped': 0}
+
+        listener = Listener(address)
+        thread = threading.Thread(target=watch._serve, args=(listener, _build), daemon=True)
+        thread.start()
+
+        try:
+            assert watch.build_remote(address)['success']
+            assert watch.build_remote(address)['success']
+
+        finally:
+            listener.close()
+
+        assert requests == [0, 1]
+
+    @pytest.mark.skipif(os.name != 'posix', reason='Unix domain sockets are required')
+    def test_watch_serve_failure(self, tmpdir: str):
+
+        address = os.path.join(tmpdir, 'epigen.sock')
+
+        def _build() -> dict:
+            raise AssertionError('Unexpected')
+
+        listener = Listener(address)
+        thread = threading.Thread(target=watch._serve, args=(listener, _build), daemon=True)
+        thread.start()
+
+        # NOTE: the failed build is reported and the daemon keeps serving
+        try:
+            for _ in range(2):
+                assert watch.build_remote(address) == {'success': False, 'parsed': 0, 'written': 0, 'skipped': 0, 'errors': ['Unexpected']}
+
+        finally:
+            listener.close()